@@ -0,0 +1,111 @@
+import os
+import threading
+import requests
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from .oauth import _authorize_with_pkce
+from .service import _JOB_RUNNERS, _parse_job_params
+from .utilities import _RateBudget, _RetryScope, _save_token, _CURRENT_ACCOUNT, _api_request
+from .constants import ACCOUNTS_DIR, ACCOUNT_WORKERS, ACCOUNT_RATE_PER_MINUTE
+
+
+class _Account:
+    """
+    Everything one Spotify account needs to run independently of the others:
+    its token file and in-memory copy, a refresh lock, a connection pool, a
+    request budget and its own circuit breaker and retry totals.
+    """
+
+    def __init__(self, user_id: str, accounts_dir: str = ACCOUNTS_DIR, rate_per_minute: float = ACCOUNT_RATE_PER_MINUTE):
+        self.user_id = user_id
+        self.token_path = os.path.join(accounts_dir, f"{user_id}.json")
+        self.token_cache: dict = {}
+        self.token_lock = threading.Lock()
+        self.session = requests.Session()
+        self.session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=8))
+        self.budget = _RateBudget(rate_per_minute)
+        self.retry_scope = _RetryScope()
+
+
+_ACCOUNTS: Dict[str, _Account] = {}
+_ACCOUNTS_LOCK = threading.Lock()
+
+
+def _get_account(user_id: str, accounts_dir: str = ACCOUNTS_DIR) -> _Account:
+    with _ACCOUNTS_LOCK:
+        account = _ACCOUNTS.get(user_id)
+        if account is None:
+            if not os.path.exists(os.path.join(accounts_dir, f"{user_id}.json")):
+                raise ValueError(f"Unknown account '{user_id}'. Add it with --add-account.")
+            account = _ACCOUNTS[user_id] = _Account(user_id, accounts_dir)
+        return account
+
+
+def list_accounts(accounts_dir: str = ACCOUNTS_DIR) -> List[str]:
+    """
+    User ids with a stored token.
+    """
+    if not os.path.isdir(accounts_dir):
+        return []
+    return sorted(f[:-5] for f in os.listdir(accounts_dir) if f.endswith(".json"))
+
+
+def add_account(accounts_dir: str = ACCOUNTS_DIR) -> str:
+    """
+    Run the browser login for one more account and store its token under its user id.
+    Returns the user id.
+    """
+    tok = _authorize_with_pkce(path=None)
+    user_id = _api_request("GET", "/me", tok["access_token"])["id"]
+    _save_token(tok, os.path.join(accounts_dir, f"{user_id}.json"))
+    with _ACCOUNTS_LOCK:
+        _ACCOUNTS.pop(user_id, None)
+    return user_id
+
+
+def _run_account_job(job: dict) -> dict:
+    entry = {"account": job.get("account"), "op": job.get("op"), "args": job.get("args") or {}}
+    ctx_token = None
+    try:
+        if entry["op"] not in _JOB_RUNNERS:
+            raise ValueError(f"Unknown operation: {entry['op']}")
+        params = _parse_job_params(entry["op"], entry["args"])
+        account = _get_account(entry["account"])
+        ctx_token = _CURRENT_ACCOUNT.set(account)
+        # Unattended: deletes never prompt, exactly as in the job service
+        entry["result"] = _JOB_RUNNERS[entry["op"]](params)
+    except Exception as e:
+        entry["error"] = str(e)
+    finally:
+        if ctx_token is not None:
+            _CURRENT_ACCOUNT.reset(ctx_token)
+    return entry
+
+
+def run_for_accounts(jobs: List[dict], max_workers: int = ACCOUNT_WORKERS) -> List[dict]:
+    """
+    Run split/delete jobs for many accounts concurrently in this process.
+
+    Each job is {"account": <user_id>, "op": "split" | "delete", "args": {...}}, with the
+    same args as the job service's POST /jobs/<op> bodies; unknown keys and non-boolean
+    flags fail the job. Different accounts run in parallel, each account's jobs one after
+    another in list order, so they never race on the same year-playlists. Every account
+    uses its own token, refresh lock, connection pool, rate budget and circuit breaker.
+    Returns one entry per job, in order, holding either "result" or "error".
+    """
+    if not jobs:
+        return []
+    by_account: Dict[str, List[int]] = {}
+    for i, job in enumerate(jobs):
+        by_account.setdefault(job.get("account"), []).append(i)
+    entries: List[dict] = [None] * len(jobs)  # type: ignore
+
+    def run_in_order(indices: List[int]) -> None:
+        for i in indices:
+            entries[i] = _run_account_job(jobs[i])
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="splitter-account") as pool:
+        list(pool.map(run_in_order, by_account.values()))
+    return entries
@@ -1,20 +1,30 @@
 import argparse
+import re
 import time
 
 from .oauth import _ensure_token
-from typing import Dict, List, Optional
-from .constants import DESCRIPTION_TAG
+from .buckets import _YearBuckets
+from .utilities import _plan_reorders, _start_retry_run, _peak_rss_mb
+from typing import Dict, List, Optional, Tuple
+from .constants import DESCRIPTION_TAG, ADD_BATCH_LIMIT, REMOVE_BATCH_LIMIT, SPILL_THRESHOLD
 
 from .spotify_helpers import (
     _current_user_id, 
     _parse_playlist_id, 
+    _fields,
     _get_playlist,
-    _iter_pages,
-    _track_uri_and_year,
-    _find_user_playlist_by_name,
+    _iter_track_refs,
+    _user_playlist_index_with_tags,
+    _remember_playlist,
+    _forget_playlist,
     _create_playlist,
     _get_playlist_track_uris,
+    _iter_playlist_track_uris,
+    _get_playlist_item_uris,
+    _reorder_items,
     _add_items_in_batches,
+    _remove_items_in_batches,
+    _replace_items,
     _iter_my_playlists,
     _playlist_is_owned_by_user,
     _playlist_has_tag,
@@ -32,10 +42,13 @@ def delete_year_playlists(
     Find year-playlists created from `source_name` and unfollow (delete) them.
     Returns a summary dict.
 
-    - If year is provided, only targets that year.
+    - source_name is the source playlist name (the prefix 'From <SourceName>:' is used).
+    - If year is provided (e.g. '2017'), only targets that year.
     - If require_tag is True, only targets playlists whose description contains DESCRIPTION_TAG.
     - If dry_run is True, only lists matching playlists (does not unfollow).
+    - If force is True, skips the interactive confirmation before unfollowing.
     """
+    retry_run = _start_retry_run()
     tok = _ensure_token()
     access_token = tok["access_token"]
     user_id = _current_user_id(access_token)
@@ -80,6 +93,7 @@ def delete_year_playlists(
         "found_playlists": [{"name": p.get("name"), "id": p.get("id")} for p in found],
         "skipped_not_owner": skipped_not_owner,
         "skipped_no_tag": skipped_no_tag,
+        "retries": retry_run.counters,
     }
 
     if dry_run:
@@ -103,6 +117,7 @@ def delete_year_playlists(
     for pl in found:
         try:
             _unfollow_playlist(access_token, pl["id"])
+            _forget_playlist(user_id, pl["id"])
             deleted.append({"name": pl.get("name"), "id": pl.get("id")})
         except Exception as e:
             failed.append({"name": pl.get("name"), "id": pl.get("id"), "error": str(e)})
@@ -115,11 +130,140 @@ def delete_year_playlists(
     return result
 
 
-def split_playlist_by_year(source_url_or_id: str, make_public: bool = False) -> dict:
+def _batches(n: int, size: int) -> int:
+    return -(-n // size)
+
+
+def _mirror_playlist(
+    token: str,
+    playlist_id: str,
+    current: List[Optional[str]],
+    desired: List[str],
+    ordered: bool = False,
+) -> Tuple[int, int, bool, int]:
+    """
+    Make `playlist_id` hold exactly `desired`, using whichever strategy needs fewer calls:
+    batched remove + add of the difference, or a full replace followed by appends.
+    `current` is the playlist's items by position (None for items without a track URI).
+    If ordered is True, the playlist is also put in `desired`'s order, and the reorder
+    calls the diff would still need count towards its cost. The replace is only considered
+    when it would keep everything the diff keeps: not when `current` holds items without a
+    track URI (local files, episodes), which cannot be re-added, or duplicates of a kept
+    track, which the diff leaves in place. Returns (added, removed, replaced, reorder calls).
+    """
+    current_tracks = [u for u in current if u is not None]
+    current_set = set(current_tracks)
+    desired_set = set(desired)
+    to_add = [u for u in desired if u not in current_set]
+    to_remove = [u for u in dict.fromkeys(current_tracks) if u not in desired_set]
+    remove_set = set(to_remove)
+
+    diff_calls = _batches(len(to_remove), REMOVE_BATCH_LIMIT) + _batches(len(to_add), ADD_BATCH_LIMIT)
+    replace_calls = max(1, _batches(len(desired), ADD_BATCH_LIMIT))
+    replaceable = None not in current and len(current_tracks) == len(current_set)
+    plan = None
+    if ordered and not (replaceable and replace_calls < diff_calls):
+        # Removal drops every occurrence; additions are appended
+        layout = [u for u in current if u not in remove_set] + to_add
+        # Once the moves alone make the diff dearer than the replace, planning can stop
+        plan = _plan_order(layout, desired, replace_calls - diff_calls if replaceable else None)
+        diff_calls += len(plan[1])
+    # Ties go to the diff: it keeps the existing items (and their added-at dates) in place
+    if replaceable and replace_calls < diff_calls:
+        _replace_items(token, playlist_id, desired)
+        return len(to_add), len(to_remove), True, 0
+
+    snapshot_id = None
+    if to_remove:
+        snapshot_id = _remove_items_in_batches(token, playlist_id, to_remove)
+    if to_add:
+        snapshot_id = _add_items_in_batches(token, playlist_id, to_add)[1] or snapshot_id
+    reorders = _order_playlist(token, playlist_id, plan, snapshot_id)[0] if plan else 0
+    return len(to_add), len(to_remove), False, reorders
+
+
+def _plan_order(
+    layout: List[Optional[str]],
+    target: List[str],
+    max_moves: Optional[int] = None,
+) -> Tuple[List[Optional[str]], List[Tuple[int, int, int]]]:
+    """
+    For items `layout` (URIs by position, None for items without a track URI), the order
+    with `target`'s URIs first in that order, followed by every other item in its current
+    order, and the reorder moves that get there. Returns (final layout, moves); see
+    `_plan_reorders` for `max_moves`.
+    """
+    rank = {u: i for i, u in enumerate(target)}
+    # sort key per current position; duplicates and unknown items keep their relative order
+    keys = []
+    seen = set()
+    for pos, u in enumerate(layout):
+        if u in rank and u not in seen:
+            seen.add(u)
+            keys.append((0, rank[u], pos))
+        else:
+            keys.append((1, 0, pos))
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    target_rank = [0] * len(keys)
+    for r, pos in enumerate(order):
+        target_rank[pos] = r
+    return [layout[pos] for pos in order], _plan_reorders(target_rank, max_moves)
+
+
+def _replace_cap(layout: List[Optional[str]]) -> Optional[int]:
+    # Moves beyond a full replace's calls are never made, unless an item can't be re-added
+    return max(1, _batches(len(layout), ADD_BATCH_LIMIT)) if None not in layout else None
+
+
+def _order_playlist(
+    token: str,
+    playlist_id: str,
+    plan: Tuple[List[Optional[str]], List[Tuple[int, int, int]]],
+    snapshot_id: Optional[str] = None,
+) -> Tuple[int, bool]:
+    """
+    Carry out a `_plan_order` plan on `playlist_id`: only out-of-place items are moved,
+    and nothing when the playlist is already in order. When a full replace takes fewer
+    calls than the moves (and every item has a URI it can be re-added by), the playlist is
+    rewritten instead. `snapshot_id`, from the writes just made, pins the first move to that
+    version of the playlist. Returns (write calls, replaced).
+    """
+    final, moves = plan
+    replace_calls = max(1, _batches(len(final), ADD_BATCH_LIMIT))
+    if replace_calls < len(moves) and None not in final:
+        _replace_items(token, playlist_id, final)
+        return replace_calls, True
+
+    for range_start, range_length, insert_before in moves:
+        snapshot_id = _reorder_items(token, playlist_id, range_start, range_length, insert_before, snapshot_id) or snapshot_id
+    return len(moves), False
+
+
+def split_playlist_by_year(
+    source_url_or_id: str,
+    make_public: bool = False,
+    mirror: bool = False,
+    sort_by_release_date: bool = False,
+    spill_threshold: Optional[int] = SPILL_THRESHOLD,
+    require_tag: bool = True,
+) -> dict:
     """
     Read `source_url_or_id`, bucket tracks by album year, create/reuse playlists per year,
     add missing tracks, and return a summary dict describing what happened.
+
+    - source_url_or_id is a Spotify playlist URL or playlist ID.
+    - If make_public is True, newly created year-playlists are public.
+    - If mirror is True, also remove tracks no longer in the source (including emptying
+      year-playlists whose year has disappeared from the source). Existing year-playlists
+      without DESCRIPTION_TAG are left untouched and reported, unless require_tag is False.
+    - If sort_by_release_date is True, reorder each year-playlist by full album release date
+      (ties keep source order), moving only the items that are out of place.
+    - If spill_threshold is set, hold at most that many track URIs in memory while
+      bucketing; beyond it the buckets and the already-present checks move to a temporary
+      on-disk store (for very large sources on small machines).
+    - If require_tag is False, mirror also updates same-named playlists that lack the tag.
     """
+    retry_run = _start_retry_run()
     token_json = _ensure_token()
     access_token = token_json["access_token"]
 
@@ -129,87 +273,147 @@ def split_playlist_by_year(source_url_or_id: str, make_public: bool = False) ->
     source = _get_playlist(access_token, source_id)
     source_name = source.get("name", f"Playlist {source_id}")
 
-    # Read items (tracks only), bucket by year
-    buckets: Dict[str, List[str]] = {}
+    # Read items (tracks only), bucket by year; de-duplicated on insert, preserving order
+    buckets = _YearBuckets(spill_threshold)
     skipped_episode = 0
     skipped_local = 0
     no_year = 0
 
-    for it in _iter_pages(
+    for ref in _iter_track_refs(
         access_token,
-        f"/playlists/{source_id}/tracks",
+        source_id,
         params={
             "limit": 100,
-            "fields": "items(is_local,track(album(release_date),type,uri),is_local),next",
+            "fields": _fields("split_items"),
             "additional_types": "track,episode",
         },
     ):
-        if it.get("is_local"):
+        if ref.kind == "local":
             skipped_local += 1
             continue
-        track = it.get("track")
-        if not track:
-            continue
-        if track.get("type") != "track":
+        if ref.kind != "track":
             skipped_episode += 1
             continue
-        tup = _track_uri_and_year(it)
-        if not tup:
-            no_year += 1
-            continue
-        uri, year = tup
-        if not year:
+        if not ref.uri or not ref.year:
             no_year += 1
             continue
-        buckets.setdefault(year, [])
-        buckets[year].append(uri)
-
-    # De-dup within each year while preserving order
-    for y in list(buckets.keys()):
-        uniq = list(dict.fromkeys(buckets[y]))
-        buckets[y] = uniq
+        buckets.add(ref.year, ref.uri, ref.release_date if sort_by_release_date else None)
+    years_found = buckets.years()
 
     # For each year, create or reuse destination playlist and add missing tracks
     created = []
     updated = []
+    replaced = []
+    skipped_no_tag = []
     per_year_added: Dict[str, int] = {}
+    per_year_removed: Dict[str, int] = {}
+    per_year_reorders: Dict[str, int] = {}
+    # One listing of your playlists instead of one per year
+    my_playlists, tagged_ids = _user_playlist_index_with_tags(access_token, user_id)
 
-    for year in sorted(buckets.keys()):
-        desired_name = f"From {source_name}: {year}"
-        description = (
-            f'Auto-generated from "{source_name}" on {time.strftime("%Y-%m-%d")} '
-            f"(year = {year}). {DESCRIPTION_TAG}"
-        )
-        dest_id = _find_user_playlist_by_name(access_token, user_id, desired_name)
-        if dest_id is None:
-            dest_id = _create_playlist(access_token, user_id, desired_name, description, public=make_public)
-            created.append(desired_name)
-            existing = set()
-        else:
-            existing = set(_get_playlist_track_uris(access_token, dest_id))
+    # Writes go in target order (release date when sorting, ties in source order) so new
+    # or rebuilt playlists need no reordering.
+    targets = set(years_found)
+    if mirror:
+        # Year-playlists for years no longer present in the source get emptied
+        year_name = re.compile(re.escape(f"From {source_name}: ") + r"(\d{4})$")
+        for name in my_playlists:
+            m = year_name.match(name)
+            if m:
+                targets.add(m.group(1))
 
-        to_add = [u for u in buckets[year] if u not in existing]
-        if to_add:
-            _add_items_in_batches(access_token, dest_id, to_add)
-            updated.append(desired_name)
-            per_year_added[year] = len(to_add)
-        else:
-            per_year_added[year] = 0
+    try:
+        for year in sorted(targets):
+            desired_name = f"From {source_name}: {year}"
+            description = (
+                f'Auto-generated from "{source_name}" on {time.strftime("%Y-%m-%d")} '
+                f"(year = {year}). {DESCRIPTION_TAG}"
+            )
+            dest_id = my_playlists.get(desired_name)
+            existed = dest_id is not None
+            if not existed:
+                dest_id = _create_playlist(access_token, user_id, desired_name, description, public=make_public)
+                _remember_playlist(user_id, desired_name, dest_id)
+                created.append(desired_name)
+
+            if mirror and existed and require_tag and dest_id not in tagged_ids:
+                # Same name but not made by us (or the tag was removed): never delete from it
+                skipped_no_tag.append({"name": desired_name, "id": dest_id})
+                continue
+
+            was_replaced = False
+            reorders = 0  # new and rebuilt playlists are written in order already
+            if mirror:
+                # Only this year's lists are materialised
+                if not existed:
+                    current = []
+                elif sort_by_release_date:
+                    current = _get_playlist_item_uris(access_token, dest_id)
+                else:
+                    current = _get_playlist_track_uris(access_token, dest_id)
+                desired = list(buckets.uris(year, by_release_date=sort_by_release_date))
+                added, removed, was_replaced, reorders = _mirror_playlist(
+                    access_token, dest_id, current, desired, ordered=sort_by_release_date
+                )
+                per_year_removed[year] = removed
+                del current, desired
+            elif sort_by_release_date and existed:
+                current = _get_playlist_item_uris(access_token, dest_id)
+                present = {u for u in current if u is not None}
+                target = list(buckets.uris(year, by_release_date=True))
+                to_add = [u for u in target if u not in present]
+                added, snapshot_id = _add_items_in_batches(access_token, dest_id, to_add)
+                layout = current + to_add
+                reorders, was_replaced = _order_playlist(
+                    access_token, dest_id, _plan_order(layout, target, _replace_cap(layout)), snapshot_id
+                )
+                del current, present, target, to_add, layout
+            else:
+                current_uris = _iter_playlist_track_uris(access_token, dest_id) if existed else ()
+                to_add = buckets.missing(year, current_uris, by_release_date=sort_by_release_date)
+                added = _add_items_in_batches(access_token, dest_id, to_add)[0]
+            if added or per_year_removed.get(year):
+                updated.append(desired_name)
+            if was_replaced:
+                replaced.append(desired_name)
+            per_year_added[year] = added
+            if sort_by_release_date:
+                per_year_reorders[year] = reorders
+
+        per_year_source_count = {y: buckets.count(y) for y in years_found}
+        spilled = buckets.spilled
+    finally:
+        buckets.close()
 
     # Build the summary dict
     total_added = sum(per_year_added.values())
     summary = {
         "source_playlist_id": source_id,
         "source_playlist_name": source_name,
-        "years_found": sorted(list(buckets.keys())),
-        "per_year_source_count": {y: len(buckets[y]) for y in buckets},
+        "years_found": years_found,
+        "per_year_source_count": per_year_source_count,
         "created_playlists": created,               # list of playlist names created
-        "updated_playlists": updated,               # list of playlist names that received additions
+        "updated_playlists": updated,               # list of playlist names that received changes
         "per_year_added": per_year_added,           # year -> number of tracks added
         "total_tracks_added": total_added,
         "skipped_episodes": skipped_episode,
         "skipped_local_files": skipped_local,
         "tracks_missing_year": no_year,
+        "retries": retry_run.counters,              # reason -> retries spent (transient API faults)
+        "spilled_to_disk": spilled,                 # buckets exceeded spill_threshold
+        # Peak RSS of the whole process so far (None if unavailable); in --serve/--watch it
+        # can come from an earlier job, so it is only an upper bound for this run
+        "process_peak_rss_mb": _peak_rss_mb(),
     }
+    if sort_by_release_date:
+        summary["per_year_reorders"] = per_year_reorders  # year -> write calls spent on ordering (0 = already sorted)
+    if mirror or sort_by_release_date:
+        summary["replaced_playlists"] = replaced    # playlists rebuilt with a full replace
+    if mirror:
+        summary.update({
+            "per_year_removed": per_year_removed,   # year -> number of tracks removed
+            "total_tracks_removed": sum(per_year_removed.values()),
+            "skipped_no_tag": skipped_no_tag,       # same-named playlists without DESCRIPTION_TAG, left as is
+        })
 
-    return summary
\ No newline at end of file
+    return summary
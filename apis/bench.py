@@ -0,0 +1,163 @@
+# playlist_creation_service/bench.py
+"""
+Benchmarks for the playlist splitter.
+
+Live API:
+    python3 -m playlist-creation-service.apis.bench fields <SOURCE_PLAYLIST_URL_OR_ID>
+    python3 -m playlist-creation-service.apis.bench record run.jsonl.gz split <SOURCE>
+
+Offline, from a recorded cassette (exits 1 when more requests are made than recorded,
+or than --max-requests):
+    python3 -m playlist-creation-service.apis.bench replay run.jsonl.gz split <SOURCE>
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+
+from typing import Dict, List, Optional, Tuple
+
+from .api import split_playlist_by_year, delete_year_playlists
+from .cassette import use_cassette
+from .oauth import _ensure_token
+from .utilities import _SESSION, _json_loads
+from .spotify_helpers import _parse_playlist_id, _fields, _clear_caches
+from .constants import API_BASE
+
+
+def _fetch_raw(token: str, path: str, params: dict) -> bytes:
+    resp = _SESSION.get(f"{API_BASE}{path}", headers={"Authorization": f"Bearer {token}"}, params=params, timeout=30)
+    resp.raise_for_status()
+    return resp.content
+
+
+def _decode_time(raw: bytes, repeat: int) -> float:
+    # median seconds for one decode of `raw`
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        _json_loads(raw)
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples)
+
+
+def bench_field_projection(source_url_or_id: str, repeat: int = 50) -> List[dict]:
+    """
+    Fetch each read endpoint once unfiltered and once with its READ_FIELDS projection,
+    and report response bytes and JSON decode time for both.
+    """
+    token = _ensure_token()["access_token"]
+    pid = _parse_playlist_id(source_url_or_id)
+
+    cases: List[Tuple[str, str, dict, Optional[str]]] = [
+        ("playlist", f"/playlists/{pid}", {"market": "from_token"}, _fields("playlist")),
+        ("split_items", f"/playlists/{pid}/tracks", {"limit": 100, "additional_types": "track,episode"}, _fields("split_items")),
+        ("track_uris", f"/playlists/{pid}/tracks", {"limit": 100, "additional_types": "track"}, _fields("track_uris")),
+        ("my_playlists", "/me/playlists", {"limit": 50}, _fields("my_playlists")),
+    ]
+
+    rows = []
+    for name, path, params, projection in cases:
+        full = _fetch_raw(token, path, params)
+        trimmed = _fetch_raw(token, path, dict(params, fields=projection))
+        full_t = _decode_time(full, repeat)
+        trimmed_t = _decode_time(trimmed, repeat)
+        rows.append({
+            "endpoint": name,
+            "full_bytes": len(full),
+            "trimmed_bytes": len(trimmed),
+            "bytes_saved_pct": round(100 * (1 - len(trimmed) / max(1, len(full))), 1),
+            "full_decode_us": round(full_t * 1e6, 1),
+            "trimmed_decode_us": round(trimmed_t * 1e6, 1),
+        })
+    return rows
+
+
+def _run_operation(op: str, target: str, year: Optional[str] = None) -> dict:
+    # Deletes are always forced (no prompt); pass dry_run via the op name
+    _clear_caches()
+    if op == "split":
+        return split_playlist_by_year(target)
+    if op == "mirror":
+        return split_playlist_by_year(target, mirror=True)
+    if op in ("delete", "delete-preview"):
+        return delete_year_playlists(target, year=year, dry_run=(op == "delete-preview"), force=True)
+    raise ValueError(f"Unknown operation: {op}")
+
+
+def record_operation(cassette_path: str, op: str, target: str, year: Optional[str] = None) -> dict:
+    """
+    Run `op` against the live API and save every request/response to `cassette_path`.
+    """
+    with use_cassette(cassette_path, mode="record") as cassette:
+        t0 = time.perf_counter()
+        _run_operation(op, target, year)
+        wall = time.perf_counter() - t0
+    return {"requests": cassette.total_requests, "wall_s": round(wall, 3), "by_endpoint": dict(cassette.request_counts)}
+
+
+def replay_operation(cassette_path: str, op: str, target: str, year: Optional[str] = None, latency_scale: float = 0.0) -> dict:
+    """
+    Run `op` offline against a recorded cassette and compare request counts with the
+    recording. latency_scale=1.0 replays the recorded latencies, 0 replays instantly.
+    """
+    with use_cassette(cassette_path, mode="replay", latency_scale=latency_scale) as cassette:
+        t0 = time.perf_counter()
+        summary = _run_operation(op, target, year)
+        wall = time.perf_counter() - t0
+    recorded = cassette.recorded_counts()
+    return {
+        "requests": cassette.total_requests,
+        "recorded_requests": sum(recorded.values()),
+        "wall_s": round(wall, 3),
+        "by_endpoint": dict(cassette.request_counts),
+        "recorded_by_endpoint": dict(recorded),
+        "summary": summary,
+    }
+
+
+def _print_rows(rows: List[Dict]) -> None:
+    if not rows:
+        return
+    cols = list(rows[0].keys())
+    widths = {c: max(len(c), *(len(str(r[c])) for r in rows)) for c in cols}
+    print("  ".join(c.ljust(widths[c]) for c in cols))
+    for r in rows:
+        print("  ".join(str(r[c]).ljust(widths[c]) for c in cols))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks for the playlist splitter.")
+    sub = parser.add_subparsers(dest="bench", required=True)
+    fields = sub.add_parser("fields", help="Bytes and JSON decode time with vs. without `fields` projection.")
+    fields.add_argument("source_playlist", help="Playlist URL or ID to read.")
+    fields.add_argument("--repeat", type=int, default=50, help="Decode repetitions per response (default 50).")
+    ops = ("split", "mirror", "delete", "delete-preview")
+    record = sub.add_parser("record", help="Run an operation live and save a cassette.")
+    replay = sub.add_parser("replay", help="Run an operation offline from a cassette and check request counts.")
+    for p in (record, replay):
+        p.add_argument("cassette", help="Cassette file (gzip JSON lines).")
+        p.add_argument("op", choices=ops, help="Operation to run.")
+        p.add_argument("target", help="Source playlist (split/mirror) or source name (delete).")
+        p.add_argument("--year", help="Year for delete operations.")
+    replay.add_argument("--latency-scale", type=float, default=0.0, help="Multiply recorded latencies (default 0 = instant).")
+    replay.add_argument("--max-requests", type=int, help="Request budget (default: the recorded count).")
+    args = parser.parse_args(argv)
+
+    if args.bench == "fields":
+        _print_rows(bench_field_projection(args.source_playlist, repeat=args.repeat))
+    elif args.bench == "record":
+        print(json.dumps(record_operation(args.cassette, args.op, args.target, args.year), indent=2))
+    elif args.bench == "replay":
+        result = replay_operation(args.cassette, args.op, args.target, args.year, latency_scale=args.latency_scale)
+        print(json.dumps(result, indent=2))
+        budget = args.max_requests if args.max_requests is not None else result["recorded_requests"]
+        if result["requests"] > budget:
+            print(f"Request-count regression: {result['requests']} > {budget}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import weakref
+
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from .constants import SPILL_INSERT_BATCH
+
+
+def _cleanup(conn: sqlite3.Connection, tmp_dir: str) -> None:
+    try:
+        conn.close()
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+class _YearBuckets:
+    """
+    Year -> de-duplicated URIs in first-seen order, for `split_playlist_by_year`.
+
+    URIs are de-duplicated as they are added, so no second copy of each bucket is made.
+    With a `spill_threshold`, once more than that many URIs are held the buckets move to
+    an on-disk SQLite table in a temporary directory (removed on close), and membership
+    checks against a destination's current tracks use an on-disk set too, so memory
+    stays bounded no matter how large the source is.
+    """
+
+    def __init__(self, spill_threshold: Optional[int] = None, tmp_dir: Optional[str] = None):
+        self.spill_threshold = spill_threshold
+        self._tmp_parent = tmp_dir
+        self._mem: Dict[str, Dict[str, Optional[str]]] = {}  # year -> {uri: release_date}
+        self._mem_items = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pending: List[tuple] = []
+        self._pos = 0
+        self._counts: Dict[str, int] = {}
+        self._finalizer = None
+
+    @property
+    def spilled(self) -> bool:
+        return self._conn is not None
+
+    def add(self, year: str, uri: str, release_date: Optional[str] = None) -> None:
+        if self._conn is not None:
+            self._pos += 1
+            self._pending.append((year, self._pos, uri, release_date))
+            if len(self._pending) >= SPILL_INSERT_BATCH:
+                self._flush()
+            return
+        bucket = self._mem.get(year)
+        if bucket is None:
+            bucket = self._mem[year] = {}
+        if uri not in bucket:
+            bucket[uri] = release_date
+            self._mem_items += 1
+            if self.spill_threshold is not None and self._mem_items > self.spill_threshold:
+                self._spill()
+
+    def years(self) -> List[str]:
+        if self._conn is None:
+            return sorted(self._mem)
+        self._flush()
+        return sorted(self._counts)
+
+    def count(self, year: str) -> int:
+        if self._conn is None:
+            return len(self._mem.get(year, ()))
+        self._flush()
+        return self._counts.get(year, 0)
+
+    def uris(self, year: str, by_release_date: bool = False) -> Iterator[str]:
+        """
+        The year's URIs in source order, or by release date (ties in source order).
+        """
+        if self._conn is None:
+            bucket = self._mem.get(year, {})
+            if by_release_date:
+                return iter(sorted(bucket, key=lambda u: bucket[u] or ""))
+            return iter(bucket)
+        self._flush()
+        order = "COALESCE(release_date, ''), pos" if by_release_date else "pos"
+        cur = self._conn.execute(f"SELECT uri FROM items WHERE year = ? ORDER BY {order}", (year,))
+        return (row[0] for row in cur)
+
+    def missing(self, year: str, current: Iterable[str], by_release_date: bool = False) -> Iterator[str]:
+        """
+        The year's URIs (in `uris` order) that are not in `current`. `current` is consumed
+        before this returns.
+        """
+        if self._conn is None:
+            existing = set(current)
+            return (u for u in self.uris(year, by_release_date) if u not in existing)
+        self._flush()
+        self._conn.execute("DELETE FROM existing")
+        self._conn.executemany("INSERT OR IGNORE INTO existing (uri) VALUES (?)", ((u,) for u in current))
+        order = "COALESCE(release_date, ''), pos" if by_release_date else "pos"
+        cur = self._conn.execute(
+            f"SELECT uri FROM items WHERE year = ? AND uri NOT IN (SELECT uri FROM existing) ORDER BY {order}",
+            (year,),
+        )
+        return (row[0] for row in cur)
+
+    def close(self) -> None:
+        if self._finalizer is not None:
+            self._finalizer()
+        self._mem.clear()
+
+    def _spill(self) -> None:
+        tmp_dir = tempfile.mkdtemp(prefix="year-splitter-", dir=self._tmp_parent)
+        # check_same_thread=False: the finalizer may run on whichever thread drops the last reference
+        conn = sqlite3.connect(os.path.join(tmp_dir, "buckets.sqlite3"), check_same_thread=False)
+        self._finalizer = weakref.finalize(self, _cleanup, conn, tmp_dir)
+        # Scratch data: no journal or fsync, small page cache, sorts spill to disk too
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("PRAGMA cache_size = -2048")
+        conn.execute("PRAGMA temp_store = FILE")
+        conn.execute(
+            "CREATE TABLE items (year TEXT, pos INTEGER, uri TEXT, release_date TEXT, "
+            "PRIMARY KEY (year, uri)) WITHOUT ROWID"
+        )
+        conn.execute("CREATE INDEX items_by_pos ON items (year, pos)")
+        conn.execute("CREATE TABLE existing (uri TEXT PRIMARY KEY) WITHOUT ROWID")
+        self._conn = conn
+        for year, bucket in self._mem.items():
+            for uri, release_date in bucket.items():
+                self._pos += 1
+                self._pending.append((year, self._pos, uri, release_date))
+                if len(self._pending) >= SPILL_INSERT_BATCH:
+                    self._flush()
+        self._mem = {}
+        self._mem_items = 0
+        self._flush()
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        # INSERT OR IGNORE keeps the first occurrence (and its position) of each (year, uri);
+        # one executemany per year so its rowcount (rows actually inserted) keeps the counts
+        by_year: Dict[str, List[tuple]] = {}
+        for row in self._pending:
+            by_year.setdefault(row[0], []).append(row)
+        self._pending = []
+        for year, rows in by_year.items():
+            cur = self._conn.executemany(
+                "INSERT OR IGNORE INTO items (year, pos, uri, release_date) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._counts[year] = self._counts.get(year, 0) + cur.rowcount
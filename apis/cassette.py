@@ -0,0 +1,195 @@
+# playlist_creation_service/cassette.py
+"""
+Record/replay transport for `_api_request`.
+
+Recording runs the real API and stores every request/response pair in a gzip-compressed
+JSON-lines cassette. Replaying serves those responses back (optionally with their original
+latency, scaled) without touching the network, so runs are deterministic and request
+counts can be compared between versions. Authorization headers are never written and
+token-like fields in bodies are scrubbed.
+"""
+import contextlib
+import gzip
+import json
+import threading
+import time
+import urllib.parse
+
+from collections import Counter, defaultdict, deque
+from typing import Deque, Dict, List, Optional
+
+from .utilities import _SESSION, _TRANSPORT, _json_loads
+
+CASSETTE_VERSION = 1
+SCRUBBED = "<scrubbed>"
+_SCRUB_KEYS = ("access_token", "refresh_token", "code_verifier", "client_secret")
+
+
+def _scrub(obj):
+    if isinstance(obj, dict):
+        return {k: (SCRUBBED if k in _SCRUB_KEYS else _scrub(v)) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_scrub(v) for v in obj]
+    return obj
+
+
+def _request_key(method: str, url: str, params: Optional[dict], json_body: Optional[dict]) -> str:
+    # Method + URL with merged, sorted query + canonical body; independent of dict ordering
+    parsed = urllib.parse.urlparse(url)
+    query = urllib.parse.parse_qsl(parsed.query, keep_blank_values=True)
+    query += [(k, str(v)) for k, v in (params or {}).items() if v is not None]
+    base = urllib.parse.urlunparse(parsed._replace(query=urllib.parse.urlencode(sorted(query))))
+    body = json.dumps(json_body, sort_keys=True, separators=(",", ":")) if json_body is not None else ""
+    return f"{method.upper()} {base} {body}"
+
+
+def _loose_key(key: str) -> str:
+    return " ".join(key.split(" ", 2)[:2])
+
+
+def _endpoint(key: str) -> str:
+    # "GET /playlists/{id}/tracks" style label for request-count reports
+    method, url = key.split(" ", 2)[:2]
+    path = urllib.parse.urlparse(url).path
+    parts = path.split("/")
+    for i, seg in enumerate(parts):
+        if i > 0 and parts[i - 1] in ("playlists", "users"):
+            parts[i] = "{id}"
+    return f"{method} {'/'.join(parts).replace('/v1', '', 1)}"
+
+
+class _ReplayResponse:
+    """
+    The subset of requests.Response that `_api_request` reads.
+    """
+
+    def __init__(self, status_code: int, headers: dict, body: str):
+        self.status_code = status_code
+        self.headers = headers
+        self.text = body
+        self.content = body.encode("utf-8")
+
+    def json(self):
+        return _json_loads(self.content)
+
+
+class Cassette:
+    """
+    mode="record": forward to the live API and remember each interaction.
+    mode="replay": answer from a saved cassette; identical requests are served in
+    recorded order (the last one repeats once exhausted), unknown requests raise.
+    """
+
+    def __init__(self, path: str, mode: str = "replay", latency_scale: float = 0.0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.interactions: List[dict] = []
+        self.request_counts: Counter = Counter()
+        self._queues: Dict[str, Deque[dict]] = defaultdict(deque)
+        self._last: Dict[str, dict] = {}
+        self._served: set = set()
+        self._lock = threading.Lock()
+        if mode == "replay":
+            self._load()
+
+    def request(self, method: str, url: str, headers: dict, params: Optional[dict], json_body: Optional[dict]):
+        key = _request_key(method, url, params, json_body)
+        with self._lock:
+            self.request_counts[_endpoint(key)] += 1
+        if self.mode == "record":
+            return self._record(key, method, url, headers, params, json_body)
+        return self._replay(key)
+
+    @property
+    def total_requests(self) -> int:
+        return sum(self.request_counts.values())
+
+    def recorded_counts(self) -> Counter:
+        return Counter(_endpoint(i["key"]) for i in self.interactions)
+
+    def save(self) -> None:
+        with gzip.open(self.path, "wt", encoding="utf-8") as f:
+            f.write(json.dumps({"version": CASSETTE_VERSION}) + "\n")
+            for it in self.interactions:
+                f.write(json.dumps(it, separators=(",", ":")) + "\n")
+
+    def _record(self, key, method, url, headers, params, json_body):
+        t0 = time.perf_counter()
+        resp = _SESSION.request(method, url, headers=headers, params=params, json=json_body, timeout=30)
+        elapsed = time.perf_counter() - t0
+        body = resp.text
+        try:
+            body = json.dumps(_scrub(json.loads(body)), separators=(",", ":")) if body else ""
+        except ValueError:
+            pass
+        keep_headers = {k: v for k, v in resp.headers.items() if k.lower() in ("retry-after", "content-type")}
+        with self._lock:
+            self.interactions.append({
+                "key": key,
+                "status": resp.status_code,
+                "headers": keep_headers,
+                "body": body,
+                "elapsed": round(elapsed, 4),
+            })
+        return resp
+
+    def _replay(self, key):
+        # Exact match first; bodies that embed run-time values (e.g. the date in a
+        # new playlist's description) fall back to method + URL in recorded order.
+        with self._lock:
+            it = self._take(key)
+            if it is None:
+                it = self._take(_loose_key(key))
+        if it is None:
+            raise RuntimeError(f"No recorded response in {self.path} for {key}")
+        if self.latency_scale > 0:
+            time.sleep(it["elapsed"] * self.latency_scale)
+        return _ReplayResponse(it["status"], dict(it["headers"]), it["body"])
+
+    def _take(self, key: str) -> Optional[dict]:
+        # Each interaction sits in an exact and a loose queue; skip ones already served
+        queue = self._queues.get(key)
+        while queue:
+            it = queue.popleft()
+            if id(it) not in self._served:
+                self._served.add(id(it))
+                self._last[key] = it
+                return it
+        return self._last.get(key)
+
+    def _load(self) -> None:
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline() or "{}")
+            if header.get("version") != CASSETTE_VERSION:
+                raise RuntimeError(f"Unsupported cassette version in {self.path}: {header.get('version')}")
+            for line in f:
+                if line.strip():
+                    it = json.loads(line)
+                    self.interactions.append(it)
+                    self._queues[it["key"]].append(it)
+                    self._queues[_loose_key(it["key"])].append(it)
+
+
+def _is_replaying() -> bool:
+    cassette = _TRANSPORT["cassette"]
+    return cassette is not None and cassette.mode == "replay"
+
+
+@contextlib.contextmanager
+def use_cassette(path: str, mode: str = "replay", latency_scale: float = 0.0):
+    """
+    Route every `_api_request` through a cassette for the duration of the block.
+    A recording is written to `path` when the block exits, even if it raised.
+    """
+    cassette = Cassette(path, mode=mode, latency_scale=latency_scale)
+    previous = _TRANSPORT["cassette"]
+    _TRANSPORT["cassette"] = cassette
+    try:
+        yield cassette
+    finally:
+        _TRANSPORT["cassette"] = previous
+        if mode == "record":
+            cassette.save()
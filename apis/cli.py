@@ -3,6 +3,7 @@ import argparse
 import sys
 import json
 from .api import split_playlist_by_year, delete_year_playlists
+from .constants import SERVICE_HOST, SERVICE_PORT, SERVICE_WORKERS, WATCH_INTERVAL, WATCH_RATE_PER_MINUTE
 
 def main(argv=None):
     parser = argparse.ArgumentParser(
@@ -20,19 +21,84 @@ def main(argv=None):
         action="store_true",
         help="Create public year-playlists (default: private).",
     )
+    parser.add_argument(
+        "--mirror",
+        action="store_true",
+        help="Also remove tracks from year-playlists that are no longer in the source.",
+    )
+    parser.add_argument(
+        "--sort",
+        action="store_true",
+        help="Order year-playlists by album release date (only out-of-place tracks are moved).",
+    )
+    parser.add_argument(
+        "--max-memory-items",
+        type=int,
+        metavar="N",
+        default=None,
+        help="Keep at most N track URIs in memory while bucketing; spill the rest to a temporary file (for very large sources).",
+    )
 
     # Delete options
     mode = parser.add_argument_group("delete mode")
     mode.add_argument("--delete-all", metavar="SOURCE_NAME", help='Delete all year playlists created from this source name.')
     mode.add_argument("--delete-year", metavar="SOURCE_NAME", help='Delete one year-playlist for this source name (use with --year YYYY).')
     mode.add_argument("--year", metavar="YYYY", help="Year to delete with --delete-year.")
-    mode.add_argument("--no-tag-check", action="store_true", help="Allow deletion even if DESCRIPTION_TAG is missing.")
+    mode.add_argument("--no-tag-check", action="store_true", help="Allow deletion (and --mirror removals) even if DESCRIPTION_TAG is missing.")
     mode.add_argument("--dry-run", action="store_true", default=True, help="Preview deletions (default on).")
     mode.add_argument("--no-dry-run", dest="dry_run", action="store_false", help="Actually delete matched playlists.")
     mode.add_argument("--force", action="store_true", help="Skip interactive confirmation when deleting.")
 
+    # Service options
+    service = parser.add_argument_group("service mode")
+    service.add_argument("--serve", action="store_true", help="Run a local HTTP job service for split/delete requests.")
+    service.add_argument("--host", default=SERVICE_HOST, help=f"Service bind address (default {SERVICE_HOST}).")
+    service.add_argument("--port", type=int, default=SERVICE_PORT, help=f"Service port (default {SERVICE_PORT}).")
+    service.add_argument("--workers", type=int, default=SERVICE_WORKERS, help=f"Concurrent jobs (default {SERVICE_WORKERS}).")
+
+    # Watch options
+    watch = parser.add_argument_group("watch mode")
+    watch.add_argument("--watch", nargs="+", metavar="SOURCE", help="Re-split these sources whenever their snapshot changes.")
+    watch.add_argument("--interval", type=float, default=WATCH_INTERVAL, help=f"Seconds between polls of one source (default {WATCH_INTERVAL}).")
+    watch.add_argument("--rate", type=float, default=WATCH_RATE_PER_MINUTE, help=f"Max snapshot polls per minute across all sources (default {WATCH_RATE_PER_MINUTE}).")
+
+    # Multi-account options
+    accounts = parser.add_argument_group("multi-account mode")
+    accounts.add_argument("--add-account", action="store_true", help="Log in to another Spotify account and store its token.")
+    accounts.add_argument("--list-accounts", action="store_true", help="List stored accounts.")
+    accounts.add_argument(
+        "--run-accounts",
+        metavar="JOBS_JSON",
+        help='Run jobs for many accounts concurrently; file holds [{"account": ..., "op": "split"|"delete", "args": {...}}].',
+    )
+
     args = parser.parse_args(argv)
 
+    # Route: accounts
+    if args.add_account or args.list_accounts or args.run_accounts:
+        from .accounts import add_account, list_accounts, run_for_accounts
+        if args.add_account:
+            print(f"Added account {add_account()}")
+        if args.list_accounts:
+            print(json.dumps(list_accounts(), indent=2))
+        if args.run_accounts:
+            with open(args.run_accounts, "r", encoding="utf-8") as f:
+                jobs = json.load(f)
+            print(json.dumps(run_for_accounts(jobs), indent=2))
+        return 0
+
+    # Route: watch
+    if args.watch:
+        from .watch import watch_sources
+        watch_sources(args.watch, make_public=bool(args.public), mirror=bool(args.mirror), sort_by_release_date=bool(args.sort), spill_threshold=args.max_memory_items, require_tag=(not args.no_tag_check), interval=args.interval, rate_per_minute=args.rate)
+        return 0
+
+    # Route: service
+    if args.serve:
+        from .service import serve
+        serve(host=args.host, port=args.port, workers=args.workers)
+        return 0
+
     # Route: delete
     if args.delete_all or args.delete_year:
         if args.delete_year and not args.year:
@@ -53,7 +119,7 @@ def main(argv=None):
     if not args.source_playlist:
         args.source_playlist = input("Enter source playlist URL or ID: ").strip()
 
-    result = split_playlist_by_year(args.source_playlist, make_public=bool(args.public))
+    result = split_playlist_by_year(args.source_playlist, make_public=bool(args.public), mirror=bool(args.mirror), sort_by_release_date=bool(args.sort), spill_threshold=args.max_memory_items, require_tag=(not args.no_tag_check))
     print(json.dumps(result, indent=2))
     return 0
 
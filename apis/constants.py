@@ -6,6 +6,20 @@ def _get_spotify_client_id() -> str:
 def _get_openai_api_key() -> str:
     return (os.getenv("OPENAI_API_KEY")).strip()
 
+def _get_seed_refresh_token() -> str:
+    # Pre-seeded refresh token for headless/CI runs: env var, or a secret file path
+    tok = os.getenv("SPOTIFY_REFRESH_TOKEN", "").strip()
+    path = os.getenv("SPOTIFY_REFRESH_TOKEN_FILE", "").strip()
+    if not tok and path and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            tok = f.read().strip()
+    return tok
+
+def _get_auth_mode() -> str:
+    # "browser" (local callback server), "paste" (print URL, paste the redirect),
+    # "none" (never prompt; fail fast), or "auto" (browser unless headless)
+    return os.getenv("SPOTIFY_AUTH_MODE", "auto").strip().lower()
+
 # SPOTIFY_CLIENT_ID = os.environ.get("SPOTIFY_CLIENT_ID", "").strip()
 REDIRECT_URI = os.environ.get("SPOTIFY_REDIRECT_URI", "http://127.0.0.1:5555/callback")
 TOKEN_PATH = os.path.expanduser("~/.spotify_year_splitter_token.json")
@@ -23,4 +37,46 @@ DESCRIPTION_TAG = "[year-splitter]"  # used to safely identify playlists we crea
 
 ACCOUNTS_BASE = "https://accounts.spotify.com"
 API_BASE = "https://api.spotify.com/v1"
-ADD_BATCH_LIMIT = 100
\ No newline at end of file
+ADD_BATCH_LIMIT = 100
+REMOVE_BATCH_LIMIT = 100
+
+# Local HTTP service mode (apis/service.py)
+SERVICE_HOST = os.environ.get("SPLITTER_SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.environ.get("SPLITTER_SERVICE_PORT", "8787"))
+SERVICE_WORKERS = 4       # concurrent split/delete jobs
+SERVICE_MAX_PENDING = 64  # queued + running jobs before new submissions get 503
+SERVICE_JOB_HISTORY = 500 # finished jobs kept for status/result lookups
+PLAYLIST_INDEX_TTL = 300  # seconds a cached name -> id index of your playlists stays warm
+
+# Watch mode (apis/watch.py)
+WATCH_STATE_PATH = os.path.expanduser("~/.spotify_year_splitter_watch.json")
+WATCH_INTERVAL = 300       # seconds between snapshot polls of one source
+WATCH_JITTER = 0.2         # +/- fraction applied to each interval
+WATCH_RATE_PER_MINUTE = 30 # snapshot polls per minute shared by all watched sources
+
+# Minimal `fields` projections for read endpoints, keyed by what the caller reads.
+# Pass fields="" to a read helper to get the full, unfiltered object.
+READ_FIELDS = {
+    "playlist": "id,name,snapshot_id,owner(id)",
+    "playlist_snapshot": "snapshot_id",
+    "my_playlists": "items(id,name,owner(id),description),next",
+    "split_items": "items(is_local,track(album(release_date),type,uri)),next",
+    "track_uris": "items(is_local,track(type,uri)),next",
+}
+
+# Multi-account execution (apis/accounts.py)
+ACCOUNTS_DIR = os.path.expanduser("~/.spotify_year_splitter_accounts")  # one <user_id>.json token per account
+ACCOUNT_WORKERS = 4                # accounts processed concurrently
+ACCOUNT_RATE_PER_MINUTE = 600      # API requests per minute per account
+
+# Retry policy for _api_request (apis/utilities.py)
+RETRY_MAX_ATTEMPTS = 5           # attempts per request, including the first
+RETRY_BASE_DELAY = 0.5           # seconds; backoff is base * 2**attempt with full jitter
+RETRY_MAX_DELAY = 30.0           # cap for a single backoff sleep
+RETRY_RUN_BUDGET = 50            # retries one split/delete run may spend in total
+CIRCUIT_FAILURE_THRESHOLD = 8    # consecutive failed requests that open the circuit
+CIRCUIT_COOLDOWN = 30.0          # seconds the circuit stays open before a trial request
+
+# Bounded-memory bucketing for huge sources (apis/buckets.py)
+SPILL_THRESHOLD = None           # URIs held in memory before buckets spill to disk; None = never spill
+SPILL_INSERT_BATCH = 1000        # rows per INSERT batch once spilled
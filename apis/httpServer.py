@@ -1,20 +1,19 @@
 import http.server
-import queue
 import urllib.parse
 import socket
 import threading
 import webbrowser
-import time
 
 from .constants import REDIRECT_URI
 
 
 class _AuthHandler(http.server.BaseHTTPRequestHandler):
     """
-    Minimal handler to capture ?code=... from the redirect and put it on a queue.
+    Minimal handler to capture ?code=...&state=... from the redirect and wake the waiter.
     """
 
-    queue_ref: "queue.Queue[str]" = None  # type: ignore
+    result_ref: dict = None  # type: ignore
+    event_ref: threading.Event = None  # type: ignore
 
     def do_GET(self):
         parsed = urllib.parse.urlparse(self.path)
@@ -32,13 +31,14 @@ class _AuthHandler(http.server.BaseHTTPRequestHandler):
         self.end_headers()
         if code:
             self.wfile.write(b"You may close this tab and return to the app. Auth code received.")
-            _AuthHandler.queue_ref.put(code)
         elif error:
             self.wfile.write(f"Authorization error: {error}".encode("utf-8"))
-            _AuthHandler.queue_ref.put_nowait("")  # signal error
         else:
             self.wfile.write(b"No code in response.")
-            _AuthHandler.queue_ref.put_nowait("")
+        # First callback wins; an empty code signals an error to the waiter
+        if not _AuthHandler.event_ref.is_set():
+            _AuthHandler.result_ref.update({"code": code or "", "state": qs.get("state", [None])[0], "error": error})
+            _AuthHandler.event_ref.set()
 
     def log_message(self, format, *args):
         # Keep console quieter
@@ -57,8 +57,10 @@ def _pick_loopback_port(host="127.0.0.1") -> int:
 
 def _run_temp_server_and_wait_for_code(expected_state: str, auth_url: str, timeout: int = 300) -> str:
     global REDIRECT_URI
-    q: "queue.Queue[str]" = queue.Queue()
-    _AuthHandler.queue_ref = q
+    result: dict = {}
+    done = threading.Event()
+    _AuthHandler.result_ref = result
+    _AuthHandler.event_ref = done
 
     # Ensure redirect host/port align with REDIRECT_URI
     parsed = urllib.parse.urlparse(REDIRECT_URI)
@@ -70,8 +72,11 @@ def _run_temp_server_and_wait_for_code(expected_state: str, auth_url: str, timeo
     if parsed.port is None:
         REDIRECT_URI = f"{parsed.scheme}://{host}:{port}{parsed.path}"
 
-    server = http.server.HTTPServer((host, port), _AuthHandler)
-    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    # Threaded so a stray request (favicon, browser preconnect) can't hold up the callback
+    server = http.server.ThreadingHTTPServer((host, port), _AuthHandler)
+    server.daemon_threads = True
+    # short poll interval: shutdown() below waits for the serve loop to notice
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
     thread.start()
 
     try:
@@ -79,23 +84,36 @@ def _run_temp_server_and_wait_for_code(expected_state: str, auth_url: str, timeo
         print(f"[Auth] If it doesn’t open automatically, visit:\n{auth_url}\n")
         webbrowser.open(auth_url, new=1, autoraise=True)
 
-        # Wait for code (or timeout)
-        start = time.time()
-        while True:
-            try:
-                code = q.get(timeout=0.5)
-                server.shutdown()
-                break
-            except queue.Empty:
-                if time.time() - start > timeout:
-                    server.shutdown()
-                    raise TimeoutError("Timed out waiting for Spotify authorization code.")
-        if not code:
-            raise RuntimeError("Failed to retrieve authorization code (empty).")
-        return code
+        # Block until the handler fires (no polling), or time out
+        if not done.wait(timeout):
+            raise TimeoutError("Timed out waiting for Spotify authorization code.")
+        if result.get("state") != expected_state:
+            raise RuntimeError("Authorization state mismatch; refusing the code.")
+        if not result.get("code"):
+            raise RuntimeError(f"Failed to retrieve authorization code: {result.get('error') or 'empty'}.")
+        return result["code"]
     finally:
+        server.shutdown()
         try:
             server.server_close()
         except Exception:
             pass
 
+
+def _prompt_for_code(expected_state: str, auth_url: str) -> str:
+    """
+    Headless login: print the authorize URL, let the user open it on any device and
+    paste back the URL they were redirected to (or just the code).
+    """
+    print("[Auth] Open this URL in a browser on any device and log in:")
+    print(f"\n{auth_url}\n")
+    print("[Auth] The browser will then fail to load the redirect page; that's expected.")
+    pasted = input("Paste the full redirected URL (or just the code): ").strip()
+    if "code=" in pasted:
+        qs = urllib.parse.parse_qs(urllib.parse.urlparse(pasted).query)
+        if qs.get("state", [expected_state])[0] != expected_state:
+            raise RuntimeError("Authorization state mismatch; refusing the code.")
+        pasted = qs.get("code", [""])[0]
+    if not pasted:
+        raise RuntimeError("Failed to retrieve authorization code (empty).")
+    return pasted
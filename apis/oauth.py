@@ -4,28 +4,77 @@ from .utilities import (
     _random_string,
     _code_challenge_from_verifier,
     _now,
-    _save_token
+    _save_token,
+    _CURRENT_ACCOUNT,
 )
 
-from .httpServer import _run_temp_server_and_wait_for_code
+from .httpServer import _run_temp_server_and_wait_for_code, _prompt_for_code
+from .cassette import _is_replaying, SCRUBBED
 
-from .constants import _get_spotify_client_id, ACCOUNTS_BASE, REDIRECT_URI, SCOPES
+from .constants import (
+    _get_spotify_client_id,
+    _get_seed_refresh_token,
+    _get_auth_mode,
+    ACCOUNTS_BASE,
+    REDIRECT_URI,
+    SCOPES,
+    TOKEN_PATH,
+)
 
 
+import os
+import sys
 import requests
+import threading
 import urllib.parse
 
+from typing import Optional
+
+# In-memory copy of the token so long-running processes don't re-read the file
+# on every call; the lock keeps concurrent workers from refreshing twice.
+_TOKEN_CACHE: dict = {}
+_TOKEN_LOCK = threading.Lock()
+
+
 def _ensure_token() -> dict:
-    tok = _load_token()
-    if not tok or _token_expired(tok):
-        if tok and "refresh_token" in tok:
-            tok = _refresh_token(tok)
-        else:
-            tok = _authorize_with_pkce()
-    return tok
+    if _is_replaying():
+        # Cassette replays never reach Spotify, so no real credentials are needed
+        return {"access_token": SCRUBBED, "token_type": "Bearer"}
+    account = _CURRENT_ACCOUNT.get()
+    if account is not None:
+        # Registered accounts never fall back to the browser flow from a worker thread
+        return _ensure_token_at(account.token_path, account.token_cache, account.token_lock, interactive=False)
+    return _ensure_token_at(TOKEN_PATH, _TOKEN_CACHE, _TOKEN_LOCK, seed=True)
 
 
-def _authorize_with_pkce() -> dict:
+def _ensure_token_at(path: str, cache: dict, lock: threading.Lock, interactive: bool = True, seed: bool = False) -> dict:
+    with lock:
+        tok = cache.get("token") or _load_token(path)
+        seed_token = _get_seed_refresh_token() if seed else None
+        if seed_token and not (tok and tok.get("refresh_token")):
+            # Headless/CI: bootstrap from a pre-seeded refresh token instead of logging in
+            tok = {"refresh_token": seed_token}
+        if not tok or _token_expired(tok):
+            if tok and tok.get("refresh_token"):
+                if seed_token and tok["refresh_token"] != seed_token:
+                    # A stale token file (e.g. its refresh token was revoked) must not
+                    # send us to the login flow while a seed is configured
+                    try:
+                        tok = _refresh_token(tok, path=path, interactive=False)
+                    except RuntimeError:
+                        tok = _refresh_token({"refresh_token": seed_token}, path=path, interactive=interactive)
+                else:
+                    tok = _refresh_token(tok, path=path, interactive=interactive)
+            elif interactive:
+                tok = _authorize_with_pkce(path=path)
+            else:
+                raise RuntimeError(f"No usable token at {path}; re-add the account.")
+        cache["token"] = tok
+        return tok
+
+
+def _authorize_with_pkce(path: Optional[str] = TOKEN_PATH) -> dict:
+    # path=None returns the token without saving it (caller decides where it goes)
     global SPOTIFY_CLIENT_ID
     SPOTIFY_CLIENT_ID = _get_spotify_client_id()
     if not SPOTIFY_CLIENT_ID:
@@ -47,7 +96,16 @@ def _authorize_with_pkce() -> dict:
     }
     auth_url = f"{ACCOUNTS_BASE}/authorize?{urllib.parse.urlencode(auth_params)}"
 
-    code = _run_temp_server_and_wait_for_code(state, auth_url)
+    mode = _resolve_auth_mode()
+    if mode == "none":
+        raise RuntimeError(
+            "Spotify login needed but interactive auth is disabled on this host. "
+            "Set SPOTIFY_REFRESH_TOKEN (or SPOTIFY_REFRESH_TOKEN_FILE), or SPOTIFY_AUTH_MODE=paste."
+        )
+    if mode == "paste":
+        code = _prompt_for_code(state, auth_url)
+    else:
+        code = _run_temp_server_and_wait_for_code(state, auth_url)
 
     token_data = {
         "client_id": SPOTIFY_CLIENT_ID,
@@ -61,13 +119,29 @@ def _authorize_with_pkce() -> dict:
         raise RuntimeError(f"Token exchange failed: {tok.status_code} {tok.text}")
     token_json = tok.json()
     token_json["obtained_at"] = _now()
-    _save_token(token_json)
+    if path:
+        _save_token(token_json, path)
     return token_json
 
 
-def _refresh_token(tok: dict) -> dict:
+def _resolve_auth_mode() -> str:
+    mode = _get_auth_mode()
+    if mode in ("browser", "paste", "none"):
+        return mode
+    # auto: no display (SSH, containers) or CI -> paste if someone can type, else fail fast
+    headless = bool(os.getenv("CI")) or (
+        sys.platform.startswith("linux") and not (os.getenv("DISPLAY") or os.getenv("WAYLAND_DISPLAY"))
+    )
+    if not headless:
+        return "browser"
+    return "paste" if sys.stdin is not None and sys.stdin.isatty() else "none"
+
+
+def _refresh_token(tok: dict, path: str = TOKEN_PATH, interactive: bool = True) -> dict:
     if not tok or "refresh_token" not in tok:
-        return _authorize_with_pkce()
+        if not interactive:
+            raise RuntimeError(f"No refresh token at {path}; re-add the account.")
+        return _authorize_with_pkce(path=path)
     data = {
         "client_id": _get_spotify_client_id(),
         "grant_type": "refresh_token",
@@ -75,13 +149,15 @@ def _refresh_token(tok: dict) -> dict:
     }
     r = requests.post(f"{ACCOUNTS_BASE}/api/token", data=data, timeout=30)
     if r.status_code != 200:
+        if not interactive:
+            raise RuntimeError(f"Token refresh failed: {r.status_code} {r.text}")
         # Fallback to full reauth
-        return _authorize_with_pkce()
+        return _authorize_with_pkce(path=path)
     new_tok = tok.copy()
     new_tok.update(r.json())
     new_tok["obtained_at"] = _now()
     # Keep the original refresh_token if a new one isn't returned
     if "refresh_token" not in new_tok:
         new_tok["refresh_token"] = tok.get("refresh_token")
-    _save_token(new_tok)
+    _save_token(new_tok, path)
     return new_tok
\ No newline at end of file
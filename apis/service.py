@@ -0,0 +1,308 @@
+import http.server
+import json
+import threading
+import time
+import urllib.parse
+import uuid
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from .api import split_playlist_by_year, delete_year_playlists
+from .oauth import _ensure_token
+from .utilities import _retry_totals
+from .spotify_helpers import _parse_playlist_id, _get_playlist
+from .constants import (
+    SERVICE_HOST,
+    SERVICE_PORT,
+    SERVICE_WORKERS,
+    SERVICE_MAX_PENDING,
+    SERVICE_JOB_HISTORY,
+)
+
+
+class _JobManager:
+    """
+    Runs split/delete jobs on a bounded worker pool and keeps their status/results.
+
+    Submitting a job identical to one that is still queued or running returns the
+    existing job instead of starting a second one (request coalescing). Different jobs
+    on the same source (e.g. a plain and a mirror split, or a split and a delete) are
+    queued per source and handed to the pool one at a time, so they never race to
+    create the same year-playlists and never hold a worker while waiting their turn.
+    """
+
+    def __init__(self, workers: int = SERVICE_WORKERS, max_pending: int = SERVICE_MAX_PENDING):
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="splitter-job")
+        self._max_pending = max_pending
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, dict] = {}
+        self._active_by_key: Dict[Tuple, str] = {}
+        self._source_queues: Dict[str, deque] = {}  # source -> jobs waiting behind the running one
+
+    def submit(self, kind: str, params: dict) -> Tuple[dict, bool]:
+        """
+        Queue a job. Returns (job, coalesced). Raises OverflowError when the queue is full.
+        """
+        key = _coalesce_key(kind, params)
+        with self._lock:
+            existing = self._active_by_key.get(key)
+            if existing:
+                return self._jobs[existing], True
+            if len(self._active_by_key) >= self._max_pending:
+                raise OverflowError("Too many pending jobs; try again later.")
+            job = {
+                "id": uuid.uuid4().hex,
+                "kind": kind,
+                "params": params,
+                "status": "queued",
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "result": None,
+                "error": None,
+            }
+            self._jobs[job["id"]] = job
+            self._active_by_key[key] = job["id"]
+            self._prune_locked()
+        source = _source_key(kind, params)
+        with self._lock:
+            waiting = self._source_queues.get(source)
+            if waiting is not None:
+                waiting.append((job, key))
+                return job, False
+            self._source_queues[source] = deque()
+        self._pool.submit(self._run, job, key, source)
+        return job, False
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list(self) -> list:
+        with self._lock:
+            return [_job_status(j) for j in self._jobs.values()]
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def _run(self, job: dict, key: Tuple, source: str) -> None:
+        try:
+            job["status"] = "running"
+            job["started_at"] = time.time()
+            job["result"] = _JOB_RUNNERS[job["kind"]](job["params"])
+            job["status"] = "done"
+        except Exception as e:
+            job["error"] = str(e)
+            job["status"] = "failed"
+        finally:
+            job["finished_at"] = time.time()
+            with self._lock:
+                if self._active_by_key.get(key) == job["id"]:
+                    del self._active_by_key[key]
+                waiting = self._source_queues[source]
+                following = waiting.popleft() if waiting else None
+                if following is None:
+                    del self._source_queues[source]
+            if following is not None:
+                try:
+                    self._pool.submit(self._run, *following, source)
+                except RuntimeError:
+                    pass  # pool shut down; the job stays queued
+
+    def _prune_locked(self) -> None:
+        # Drop the oldest finished jobs once the history is full
+        finished = [j for j in self._jobs.values() if j["status"] in ("done", "failed")]
+        overflow = len(self._jobs) - SERVICE_JOB_HISTORY
+        for job in sorted(finished, key=lambda j: j["finished_at"] or 0)[:max(0, overflow)]:
+            del self._jobs[job["id"]]
+
+
+def _run_split(params: dict) -> dict:
+    return split_playlist_by_year(
+        params["source"],
+        make_public=params["make_public"],
+        mirror=params["mirror"],
+        sort_by_release_date=params["sort_by_release_date"],
+        spill_threshold=params["spill_threshold"],
+        require_tag=params["require_tag"],
+    )
+
+
+def _run_delete(params: dict) -> dict:
+    # No stdin in service mode: deletions are confirmed by asking for dry_run=false explicitly
+    return delete_year_playlists(
+        source_name=params["source_name"],
+        year=params["year"],
+        require_tag=params["require_tag"],
+        dry_run=params["dry_run"],
+        force=True,
+    )
+
+
+_JOB_RUNNERS = {
+    "split": _run_split,
+    "delete": _run_delete,
+}
+
+
+_JOB_KEYS = {
+    "split": {"source_playlist", "source", "make_public", "mirror", "sort_by_release_date", "spill_threshold", "no_tag_check"},
+    "delete": {"source_name", "year", "dry_run", "no_tag_check"},
+}
+
+
+def _parse_job_params(kind: str, body: dict) -> dict:
+    # Also used for --run-accounts job args; a misspelt flag must not be silently ignored
+    unknown = sorted(set(body) - _JOB_KEYS.get(kind, set(body)))
+    if unknown:
+        raise ValueError(f"Unknown argument(s) for {kind}: {', '.join(unknown)}")
+    if kind == "split":
+        source = body.get("source_playlist") or body.get("source")
+        if not source:
+            raise ValueError("Missing 'source_playlist'.")
+        return {
+            "source": _parse_playlist_id(str(source).strip()),
+            "make_public": _optional_bool(body.get("make_public"), "make_public", False),
+            "mirror": _optional_bool(body.get("mirror"), "mirror", False),
+            "sort_by_release_date": _optional_bool(body.get("sort_by_release_date"), "sort_by_release_date", False),
+            "spill_threshold": _optional_int(body.get("spill_threshold"), "spill_threshold"),
+            "require_tag": not _optional_bool(body.get("no_tag_check"), "no_tag_check", False),
+        }
+    if kind == "delete":
+        source_name = body.get("source_name")
+        if not source_name:
+            raise ValueError("Missing 'source_name'.")
+        year = body.get("year")
+        return {
+            "source_name": source_name,
+            "year": str(year) if year else None,
+            "require_tag": not _optional_bool(body.get("no_tag_check"), "no_tag_check", False),
+            "dry_run": _optional_bool(body.get("dry_run"), "dry_run", True),
+        }
+    raise ValueError(f"Unknown job kind: {kind}")
+
+
+def _optional_bool(value, name: str, default: bool) -> bool:
+    # Strict: a string like "false" must not silently turn into True
+    if value is None:
+        return default
+    if not isinstance(value, bool):
+        raise ValueError(f"'{name}' must be true or false.")
+    return value
+
+
+def _optional_int(value, name: str) -> Optional[int]:
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+        raise ValueError(f"'{name}' must be a non-negative integer.")
+    return value
+
+
+def _source_key(kind: str, params: dict) -> str:
+    # Year-playlists are named after the source playlist's name, so that is what
+    # splits (given a URL/ID) and deletes (given a name) have in common
+    if kind == "split":
+        try:
+            access_token = _ensure_token()["access_token"]
+            name = _get_playlist(access_token, params["source"]).get("name")
+        except Exception:
+            name = None  # the split itself will report the error
+        return (name or params["source"]).strip().lower()
+    return params["source_name"].strip().lower()
+
+
+def _coalesce_key(kind: str, params: dict) -> Tuple:
+    return (kind,) + tuple(sorted(params.items()))
+
+
+def _job_status(job: dict) -> dict:
+    return {k: job[k] for k in ("id", "kind", "params", "status", "created_at", "started_at", "finished_at", "error")}
+
+
+class _ServiceHandler(http.server.BaseHTTPRequestHandler):
+    """
+    JSON endpoints:
+      POST /jobs/split    {"source_playlist": ..., "make_public": false, "mirror": false,
+                          "sort_by_release_date": false, "spill_threshold": null,
+                          "no_tag_check": false}
+      POST /jobs/delete   {"source_name": ..., "year": null, "dry_run": true, "no_tag_check": false}
+      GET  /jobs          list job statuses
+      GET  /jobs/<id>     job status
+      GET  /jobs/<id>/result
+      GET  /health
+    """
+
+    manager_ref: "_JobManager" = None  # type: ignore
+
+    def do_GET(self):
+        parts = [p for p in urllib.parse.urlparse(self.path).path.split("/") if p]
+        if parts == ["health"]:
+            return self._send(200, {"status": "ok", "retries": _retry_totals()})
+        if parts == ["jobs"]:
+            return self._send(200, {"jobs": _ServiceHandler.manager_ref.list()})
+        if len(parts) in (2, 3) and parts[0] == "jobs":
+            job = _ServiceHandler.manager_ref.get(parts[1])
+            if not job:
+                return self._send(404, {"error": "Unknown job id."})
+            if len(parts) == 2:
+                return self._send(200, _job_status(job))
+            if parts[2] == "result":
+                if job["status"] == "done":
+                    return self._send(200, job["result"])
+                if job["status"] == "failed":
+                    return self._send(500, {"error": job["error"]})
+                return self._send(202, _job_status(job))
+        return self._send(404, {"error": "Not found."})
+
+    def do_POST(self):
+        parts = [p for p in urllib.parse.urlparse(self.path).path.split("/") if p]
+        if len(parts) != 2 or parts[0] != "jobs":
+            return self._send(404, {"error": "Not found."})
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(body, dict):
+                raise ValueError("Expected a JSON object.")
+            params = _parse_job_params(parts[1], body)
+        except ValueError as e:
+            return self._send(400, {"error": str(e)})
+        try:
+            job, coalesced = _ServiceHandler.manager_ref.submit(parts[1], params)
+        except OverflowError as e:
+            return self._send(503, {"error": str(e)})
+        status = _job_status(job)
+        status["coalesced"] = coalesced
+        return self._send(202, status)
+
+    def _send(self, code: int, payload: dict) -> None:
+        data = json.dumps(payload, default=str).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Keep console quieter
+        return
+
+
+def serve(host: str = SERVICE_HOST, port: int = SERVICE_PORT, workers: int = SERVICE_WORKERS) -> None:
+    """
+    Run the job service until interrupted. Auth happens once at startup so jobs
+    never block on the browser flow.
+    """
+    _ensure_token()
+    manager = _JobManager(workers=workers)
+    _ServiceHandler.manager_ref = manager
+    server = http.server.ThreadingHTTPServer((host, port), _ServiceHandler)
+    print(f"[Service] Listening on http://{host}:{port} with {workers} worker(s)")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        manager.shutdown()
@@ -1,16 +1,47 @@
-from .utilities import _api_request
+from .utilities import _api_request, _now
+import itertools
+import sys
+import threading
 import urllib.parse
-from typing import Dict, List, Optional, Tuple
-from .constants import API_BASE, ADD_BATCH_LIMIT
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+from .constants import API_BASE, ADD_BATCH_LIMIT, REMOVE_BATCH_LIMIT, PLAYLIST_INDEX_TTL, READ_FIELDS, DESCRIPTION_TAG
+
+# Warm caches shared by every call in this process (CLI run, REPL or service).
+_USER_ID_CACHE: Dict[str, str] = {}                         # access token -> user id
+_PLAYLIST_INDEX: Dict[str, Tuple[int, Dict[str, str], Set[str]]] = {}  # user id -> (built_at, name -> id, tagged ids)
+_CACHE_LOCK = threading.Lock()
+
+
+def _clear_caches() -> None:
+    with _CACHE_LOCK:
+        _USER_ID_CACHE.clear()
+        _PLAYLIST_INDEX.clear()
+
 
 def _current_user_id(token: str) -> str:
+    cached = _USER_ID_CACHE.get(token)
+    if cached:
+        return cached
     me = _api_request("GET", "/me", token)
+    with _CACHE_LOCK:
+        _USER_ID_CACHE[token] = me["id"]
     return me["id"]
 
 
+def _fields(key: str, override: Optional[str] = None) -> Optional[str]:
+    """
+    Field projection for a read endpoint: `override` if given ("" = no filter),
+    else the minimal set from READ_FIELDS.
+    """
+    if override is not None:
+        return override or None
+    return READ_FIELDS[key]
+
+
 def _iter_pages(token: str, path: str, params: Optional[dict] = None):
     params = dict(params or {})
     params.setdefault("limit", 50)
+    fields = params.get("fields")
     url = f"{API_BASE}{path}"
     while True:
         data = _api_request("GET", url, token, params=params)
@@ -20,6 +51,9 @@ def _iter_pages(token: str, path: str, params: Optional[dict] = None):
         if data.get("next"):
             url = data["next"]
             params = None  # next already contains query
+            # ...except sometimes the projection, which would silently widen later pages
+            if fields and "fields=" not in url:
+                params = {"fields": fields}
         else:
             break
 
@@ -34,50 +68,67 @@ def _parse_playlist_id(url_or_id: str) -> str:
     return url_or_id
 
 
-def _is_track_item(item: dict) -> bool:
-    # Guard against episodes, locals, and null track
-    if not item or item.get("is_local"):
-        return False
-    track = item.get("track")
-    if not track:
-        return False
-    return track.get("type") == "track"
+class TrackRef(NamedTuple):
+    """
+    Compact record of one playlist item: the URI, the release year (or None), the
+    item kind ("track", "episode", "local") and the full album release date.
+    Replaces the nested item dict in hot loops.
+    """
+    uri: Optional[str]
+    year: Optional[str]
+    kind: str
+    release_date: Optional[str] = None
 
 
-def _track_uri_and_year(item: dict) -> Optional[Tuple[str, Optional[str]]]:
+def _track_ref(item: dict) -> Optional[TrackRef]:
+    # None for empty slots (removed/unavailable tracks come back as track: null)
+    if not item:
+        return None
+    if item.get("is_local"):
+        return TrackRef(None, None, "local")
     track = item.get("track")
     if not track:
         return None
+    kind = track.get("type")
     uri = track.get("uri")
-    album = track.get("album") or {}
-    release_date = album.get("release_date")
-    if not uri or not release_date:
-        return None
-    # release_date can be YYYY, YYYY-MM, or YYYY-MM-DD; take the first 4 chars.
-    year = release_date[:4] if len(release_date) >= 4 else None
-    return uri, year
-
-
-def _find_user_playlist_by_name(token: str, user_id: str, name_exact: str) -> Optional[str]:
-    # List current user's playlists and look for exact name match
-    for it in _iter_pages(token, "/me/playlists", params={"limit": 50}):
-        if it.get("name") == name_exact and it.get("owner", {}).get("id") == user_id:
-            return it.get("id")
-    return None
-
-
-def _get_playlist_track_uris(token: str, playlist_id: str) -> List[str]:
-    uris = []
-    for it in _iter_pages(
-        token,
-        f"/playlists/{playlist_id}/tracks",
-        params={"fields": "items(is_local,track(uri,type)),next,items.track.uri", "limit": 100, "additional_types": "track"},
-    ):
-        if _is_track_item(it):
-            t = it.get("track") or {}
-            u = t.get("uri")
-            if u:
-                uris.append(u)
+    if kind != "track":
+        return TrackRef(uri, None, "episode")
+    release_date = (track.get("album") or {}).get("release_date")
+    # release_date can be YYYY, YYYY-MM, or YYYY-MM-DD; years are interned since
+    # a large source shares only a few dozen distinct values.
+    year = sys.intern(release_date[:4]) if uri and release_date and len(release_date) >= 4 else None
+    return TrackRef(uri, year, "track", release_date)
+
+
+def _iter_track_refs(token: str, playlist_id: str, params: Optional[dict] = None) -> Iterator[TrackRef]:
+    # Items are converted as each page is read, so no page dicts outlive their page
+    for it in _iter_pages(token, f"/playlists/{playlist_id}/tracks", params=params):
+        ref = _track_ref(it)
+        if ref is not None:
+            yield ref
+
+
+def _iter_playlist_track_uris(token: str, playlist_id: str, fields: Optional[str] = None) -> Iterator[str]:
+    params = {"limit": 100, "additional_types": "track"}
+    projection = _fields("track_uris", fields)
+    if projection:
+        params["fields"] = projection
+    for ref in _iter_track_refs(token, playlist_id, params=params):
+        if ref.kind == "track" and ref.uri:
+            yield ref.uri
+
+
+def _get_playlist_track_uris(token: str, playlist_id: str, fields: Optional[str] = None) -> List[str]:
+    return list(_iter_playlist_track_uris(token, playlist_id, fields))
+
+
+def _get_playlist_item_uris(token: str, playlist_id: str) -> List[Optional[str]]:
+    # One entry per item position (None for locals/episodes/empty slots), for reordering
+    uris: List[Optional[str]] = []
+    params = {"limit": 100, "additional_types": "track,episode", "fields": _fields("track_uris")}
+    for it in _iter_pages(token, f"/playlists/{playlist_id}/tracks", params=params):
+        ref = _track_ref(it)
+        uris.append(ref.uri if ref is not None and ref.kind == "track" else None)
     return uris
 
 
@@ -87,14 +138,59 @@ def _create_playlist(token: str, user_id: str, name: str, description: str, publ
     return pl["id"]
 
 
-def _get_playlist(token: str, playlist_id: str) -> dict:
-    return _api_request("GET", f"/playlists/{playlist_id}", token, params={"market": "from_token"})
+def _get_playlist(token: str, playlist_id: str, fields: Optional[str] = None) -> dict:
+    # By default only playlist metadata; the full object also embeds the first 100 tracks
+    params = {"market": "from_token"}
+    projection = _fields("playlist", fields)
+    if projection:
+        params["fields"] = projection
+    return _api_request("GET", f"/playlists/{playlist_id}", token, params=params)
+
+
+def _get_playlist_snapshot_id(token: str, playlist_id: str) -> Optional[str]:
+    # Tiny response: the snapshot id changes whenever the playlist's items change
+    data = _get_playlist(token, playlist_id, fields=_fields("playlist_snapshot"))
+    return (data or {}).get("snapshot_id")
+
+
+def _add_items_in_batches(token: str, playlist_id: str, uris: Iterable[str]) -> Tuple[int, Optional[str]]:
+    # Accepts any iterable (e.g. a cursor over spilled buckets); returns how many were
+    # added and the playlist's snapshot_id after the last batch
+    added = 0
+    snapshot_id = None
+    it = iter(uris)
+    while True:
+        chunk = list(itertools.islice(it, ADD_BATCH_LIMIT))
+        if not chunk:
+            return added, snapshot_id
+        resp = _api_request("POST", f"/playlists/{playlist_id}/tracks", token, json_body={"uris": chunk})
+        snapshot_id = (resp or {}).get("snapshot_id") or snapshot_id
+        added += len(chunk)
+
+
+def _remove_items_in_batches(token: str, playlist_id: str, uris: List[str]) -> Optional[str]:
+    # Removes every occurrence of each URI; returns the snapshot_id after the last batch
+    snapshot_id = None
+    for i in range(0, len(uris), REMOVE_BATCH_LIMIT):
+        chunk = uris[i : i + REMOVE_BATCH_LIMIT]
+        resp = _api_request("DELETE", f"/playlists/{playlist_id}/tracks", token, json_body={"tracks": [{"uri": u} for u in chunk]})
+        snapshot_id = (resp or {}).get("snapshot_id") or snapshot_id
+    return snapshot_id
+
 
+def _replace_items(token: str, playlist_id: str, uris: List[str]) -> None:
+    # PUT replaces the whole playlist with (at most) the first 100 URIs; append the rest
+    _api_request("PUT", f"/playlists/{playlist_id}/tracks", token, json_body={"uris": uris[:ADD_BATCH_LIMIT]})
+    if len(uris) > ADD_BATCH_LIMIT:
+        _add_items_in_batches(token, playlist_id, uris[ADD_BATCH_LIMIT:])
 
-def _add_items_in_batches(token: str, playlist_id: str, uris: List[str]) -> None:
-    for i in range(0, len(uris), ADD_BATCH_LIMIT):
-        chunk = uris[i : i + ADD_BATCH_LIMIT]
-        _api_request("POST", f"/playlists/{playlist_id}/tracks", token, json_body={"uris": chunk})
+
+def _reorder_items(token: str, playlist_id: str, range_start: int, range_length: int, insert_before: int, snapshot_id: Optional[str] = None) -> Optional[str]:
+    body = {"range_start": range_start, "range_length": range_length, "insert_before": insert_before}
+    if snapshot_id:
+        body["snapshot_id"] = snapshot_id
+    resp = _api_request("PUT", f"/playlists/{playlist_id}/tracks", token, json_body=body)
+    return (resp or {}).get("snapshot_id")
 
 
 def _playlist_is_owned_by_user(pl: dict, user_id: str) -> bool:
@@ -108,6 +204,53 @@ def _unfollow_playlist(token: str, playlist_id: str) -> None:
     # DELETE /v1/playlists/{playlist_id}/followers
     _api_request("DELETE", f"/playlists/{playlist_id}/followers", token)
 
-def _iter_my_playlists(token: str):
-    # Iterate all of *your* playlists
-    yield from _iter_pages(token, "/me/playlists", params={"limit": 50})
+def _iter_my_playlists(token: str, fields: Optional[str] = None):
+    # Iterate all of *your* playlists. Spotify only documents `fields` on the
+    # /playlists endpoints; elsewhere it is ignored, so sending it is harmless.
+    params = {"limit": 50}
+    projection = _fields("my_playlists", fields)
+    if projection:
+        params["fields"] = projection
+    yield from _iter_pages(token, "/me/playlists", params=params)
+
+
+def _user_playlist_index_with_tags(token: str, user_id: str, refresh: bool = False) -> Tuple[Dict[str, str], Set[str]]:
+    """
+    Name -> id map of playlists owned by `user_id`, plus the ids of those whose description
+    contains DESCRIPTION_TAG, built from one listing of /me/playlists and reused for
+    PLAYLIST_INDEX_TTL seconds. The first playlist with a given name wins.
+    """
+    # Copies, so callers never see later _remember/_forget updates half-way
+    with _CACHE_LOCK:
+        entry = _PLAYLIST_INDEX.get(user_id)
+        if entry and not refresh and _now() - entry[0] < PLAYLIST_INDEX_TTL:
+            return dict(entry[1]), set(entry[2])
+
+    index: Dict[str, str] = {}
+    tagged: Set[str] = set()
+    for it in _iter_my_playlists(token):
+        if _playlist_is_owned_by_user(it, user_id) and it.get("name"):
+            index.setdefault(it["name"], it.get("id"))
+            if _playlist_has_tag(it, DESCRIPTION_TAG):
+                tagged.add(it.get("id"))
+    with _CACHE_LOCK:
+        _PLAYLIST_INDEX[user_id] = (_now(), index, tagged)
+        return dict(index), set(tagged)
+
+
+def _remember_playlist(user_id: str, name: str, playlist_id: str) -> None:
+    # Playlists created by the splitter always carry DESCRIPTION_TAG
+    with _CACHE_LOCK:
+        entry = _PLAYLIST_INDEX.get(user_id)
+        if entry:
+            entry[1].setdefault(name, playlist_id)
+            entry[2].add(playlist_id)
+
+
+def _forget_playlist(user_id: str, playlist_id: str) -> None:
+    with _CACHE_LOCK:
+        entry = _PLAYLIST_INDEX.get(user_id)
+        if entry:
+            for name in [n for n, pid in entry[1].items() if pid == playlist_id]:
+                del entry[1][name]
+            entry[2].discard(playlist_id)
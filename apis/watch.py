@@ -0,0 +1,90 @@
+import heapq
+import json
+import os
+import random
+import time
+
+from typing import Dict, List, Optional
+
+from .api import split_playlist_by_year
+from .oauth import _ensure_token
+from .utilities import _RateBudget
+from .spotify_helpers import _parse_playlist_id, _get_playlist_snapshot_id
+from .constants import WATCH_STATE_PATH, WATCH_INTERVAL, WATCH_JITTER, WATCH_RATE_PER_MINUTE, SPILL_THRESHOLD
+
+
+def _load_watch_state(path: str = WATCH_STATE_PATH) -> Dict[str, str]:
+    # source playlist id -> last snapshot_id we split from
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def _save_watch_state(state: Dict[str, str], path: str = WATCH_STATE_PATH) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+
+
+def _jittered(interval: float, jitter: float) -> float:
+    return max(1.0, interval * (1 + random.uniform(-jitter, jitter)))
+
+
+def watch_sources(
+    sources: List[str],
+    make_public: bool = False,
+    mirror: bool = False,
+    sort_by_release_date: bool = False,
+    spill_threshold: Optional[int] = SPILL_THRESHOLD,
+    require_tag: bool = True,
+    interval: float = WATCH_INTERVAL,
+    jitter: float = WATCH_JITTER,
+    rate_per_minute: float = WATCH_RATE_PER_MINUTE,
+    state_path: str = WATCH_STATE_PATH,
+    max_polls: Optional[int] = None,
+) -> None:
+    """
+    Poll each source's `snapshot_id` and re-run `split_playlist_by_year` only when it changed
+    since the last split (persisted in `state_path`). Unchanged sources cost one tiny request
+    per poll. Polls are spread with jittered intervals and share one rate budget.
+    Runs until interrupted, or until `max_polls` polls have been made.
+    """
+    source_ids = list(dict.fromkeys(_parse_playlist_id(s) for s in sources))
+    if not source_ids:
+        raise ValueError("No source playlists to watch.")
+
+    state = _load_watch_state(state_path)
+    budget = _RateBudget(rate_per_minute)
+
+    # Stagger the first round so sources don't all fire at once
+    now = time.monotonic()
+    schedule = [(now + random.uniform(0, min(interval, 5.0)), sid) for sid in source_ids]
+    heapq.heapify(schedule)
+
+    polls = 0
+    print(f"[Watch] Watching {len(source_ids)} source(s) every ~{interval:.0f}s")
+    while max_polls is None or polls < max_polls:
+        due, sid = heapq.heappop(schedule)
+        delay = due - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+        budget.acquire()
+        polls += 1
+        try:
+            access_token = _ensure_token()["access_token"]
+            snapshot = _get_playlist_snapshot_id(access_token, sid)
+            if snapshot and snapshot != state.get(sid):
+                print(f"[Watch] {sid} changed (snapshot {snapshot}); splitting…")
+                summary = split_playlist_by_year(sid, make_public=make_public, mirror=mirror, sort_by_release_date=sort_by_release_date, spill_threshold=spill_threshold, require_tag=require_tag)
+                state[sid] = snapshot
+                _save_watch_state(state, state_path)
+                print(f"[Watch] {sid}: added {summary['total_tracks_added']} track(s)")
+        except Exception as e:
+            print(f"[Watch] {sid}: {e}")
+
+        heapq.heappush(schedule, (time.monotonic() + _jittered(interval, jitter), sid))
@@ -1,30 +1,29 @@
 #!/usr/bin/env python3
+"""
+Export the generated Jarvis tool schemas for inspection:
+
+    python3 -m playlist-creation-service.jarvis.helpers_or_extras.convert_functions_to_tools
+
+Jarvis itself builds (and caches) the schemas from the API signatures at startup;
+these files are only a readable snapshot of what the LLM is given.
+"""
 import json
 from pathlib import Path
-import sys
-
-SRC = Path("jarvis_functions.json")
-DST = Path("jarvis_tools.json")
-
-if not SRC.exists():
-    print(f"Source file not found: {SRC.resolve()}")
-    sys.exit(1)
-
-data = json.loads(SRC.read_text(encoding="utf-8"))
-if not isinstance(data, list):
-    print("Expected a list of function definitions in jarvis_functions.json")
-    sys.exit(1)
-
-tools = []
-for fn in data:
-    # basic validation
-    if not isinstance(fn, dict) or "name" not in fn:
-        print("Skipping invalid function entry:", fn)
-        continue
-    tools.append({
-        "type": "function",
-        "function": fn
-    })
-
-DST.write_text(json.dumps(tools, indent=2, ensure_ascii=False), encoding="utf-8")
-print(f"Wrote {len(tools)} tools to {DST.resolve()}")
+
+from ..tool_registry import get_registry
+
+HERE = Path(__file__).resolve().parent
+FUNCTIONS_DST = HERE / "jarvis_functions.json"
+TOOLS_DST = HERE.parent / "jarvis_tools.json"
+
+
+def main() -> int:
+    tools = get_registry().schemas
+    TOOLS_DST.write_text(json.dumps(tools, indent=2, ensure_ascii=False), encoding="utf-8")
+    FUNCTIONS_DST.write_text(json.dumps([t["function"] for t in tools], indent=4, ensure_ascii=False), encoding="utf-8")
+    print(f"Wrote {len(tools)} tools to {TOOLS_DST} and {FUNCTIONS_DST}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,5 +1,10 @@
 import json
-from .llm_helpers import safe_invoke_tool, ask_llm_to_say_tool_result,call_llm_choose_tool
+from .llm_helpers import (
+    ask_llm_to_say_batch_result,
+    call_llm_choose_tools,
+    plan_tool_batch,
+    run_tool_batch,
+)
 
 def speak(text: str) -> None:
     """Placeholder speak function. Replace with your TTS call."""
@@ -23,36 +28,35 @@ def interactive_loop():
             return
 
         try:
-            decision = call_llm_choose_tool(user)
+            decision = call_llm_choose_tools(user)
         except Exception as e:
             print("LLM error:", e)
             continue
 
-        if decision.get("name") is None:
+        if not decision["calls"]:
             # LLM did not choose a function; just print what it said
             print("[assistant]:", decision.get("text"))
             continue
 
-        func_name = decision["name"]
-        func_args = decision["args"]
-        print(f"[debug] LLM decided to call: {func_name} with args {func_args}")
+        plan = plan_tool_batch(decision["calls"])
+        for i, stage in enumerate(plan["stages"]):
+            for call in stage:
+                print(f"[debug] stage {i}: {call['name']} with args {call['args']}")
+        for bad in plan["rejected"]:
+            print(f"[debug] rejected {bad['name']}: {bad['error']}")
 
-        # Call the actual tool (your API)
-        try:
-            tool_result = safe_invoke_tool(func_name, func_args)
-        except Exception as e:
-            # If tool failed, ask LLM to explain the error in user-friendly terms
-            print("Tool error:", e)
-            err_reply = f"Sorry — the operation failed: {e}"
-            print(err_reply)
-            continue
+        # Call the actual tools (your API); independent calls run concurrently
+        tool_results = run_tool_batch(plan)
+        for r in tool_results:
+            if "error" in r:
+                print(f"Tool error ({r['name']}):", r["error"])
 
-        # Ask LLM to generate a spoken reply summarizing the tool result
+        # Ask LLM to generate one spoken reply summarizing all tool results
         try:
-            reply_text = ask_llm_to_say_tool_result(user, func_name, func_args, tool_result)
+            reply_text = ask_llm_to_say_batch_result(user, tool_results)
         except Exception as e:
             # fallback: basic summary
-            reply_text = f"Operation completed. Result: {json.dumps(tool_result, indent=2)[:400]}"
+            reply_text = f"Operation(s) completed. Results: {json.dumps(tool_results, indent=2, default=str)[:400]}"
         print("[Jarvis]:", reply_text)
         # Optionally synthesize voice
         speak(reply_text)
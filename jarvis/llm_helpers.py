@@ -1,9 +1,12 @@
 # llm_helpers.py
 import json
 import os
-import pathlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
 
-from ..apis.api import split_playlist_by_year, delete_year_playlists
+from .tool_registry import get_registry
+from ..apis.oauth import _ensure_token
+from ..apis.spotify_helpers import _parse_playlist_id
 from ..apis.constants import _get_openai_api_key
 
 try:
@@ -17,10 +20,10 @@ except Exception as e:
     ) from e
 
 CHAT_MODEL = "gpt-4o-mini"
-FUNCTIONS_PATH = pathlib.Path(__file__).parent / "jarvis_tools.json"
-
-with FUNCTIONS_PATH.open("r", encoding="utf-8") as f:
-    LLM_FUNCTIONS = json.load(f)
+BATCH_MAX_WORKERS = 4
+# Tool schemas and dispatch are generated from the API signatures (see tool_registry.py)
+TOOL_REGISTRY = get_registry()
+LLM_FUNCTIONS = TOOL_REGISTRY.schemas
 
 OPENAI_API_KEY = _get_openai_api_key()
 if not OPENAI_API_KEY:
@@ -30,11 +33,12 @@ if not OPENAI_API_KEY:
 client = OpenAI(api_key=OPENAI_API_KEY)
 
 
-def call_llm_choose_tool(user_text: str) -> dict:
+def call_llm_choose_tools(user_text: str) -> dict:
     """
-    Ask the LLM which function/tool to call based on the user's text.
+    Ask the LLM which functions/tools to call based on the user's text.
+    A single utterance may map to several tool calls (e.g. "split A and B").
     Returns:
-        { "name": <function_name_or_None>, "args": {...}, "raw_response": ... }
+        { "calls": [{"id": ..., "name": ..., "args": {...}}, ...], "text": ..., "raw_response": ... }
     """
 
     messages = [
@@ -43,9 +47,10 @@ def call_llm_choose_tool(user_text: str) -> dict:
             "role": "system",
             "content": (
                 "Available tools:\n"
-                "1) spotify_split_playlist(source_playlist: str, make_public: bool)\n"
-                "2) spotify_delete_year_playlists(source_name: str, year: Optional[str], dry_run: bool, force: bool, no_tag_check: bool)\n\n"
+                + "".join(f"{i}) {line}\n" for i, line in enumerate(TOOL_REGISTRY.signature_lines(), 1))
+                + "\n"
                 "When the user asks for an operation on playlists, respond with a function call in JSON (using the provided schema). "
+                "If the user asks for several operations, emit one function call per operation in the same reply. "
                 "Only call a function when fully confident which one to use. "
                 "If ambiguous, ask a clarifying question."
             )
@@ -58,6 +63,7 @@ def call_llm_choose_tool(user_text: str) -> dict:
         messages=messages,
         tools=LLM_FUNCTIONS,
         tool_choice="auto",
+        parallel_tool_calls=True,
         max_tokens=800,
         temperature=0.0,
     )
@@ -65,31 +71,17 @@ def call_llm_choose_tool(user_text: str) -> dict:
     # pick the first choice
     choice = resp.choices[0]
 
-    #
-    # If the model selected a tool call
-    #
-    if choice.finish_reason == "tool_calls" and choice.message.tool_calls:
-        tool_call = choice.message.tool_calls[0]
-        name = tool_call.function.name
+    calls = []
+    for tool_call in choice.message.tool_calls or []:
         raw_args = tool_call.function.arguments
-
         try:
             args = json.loads(raw_args)
         except Exception:
             args = {"raw": raw_args}
+        calls.append({"id": tool_call.id, "name": tool_call.function.name, "args": args})
 
-        return {
-            "name": name,
-            "args": args,
-            "raw_response": resp
-        }
-
-    #
-    # No tool call — plain text reply
-    #
     return {
-        "name": None,
-        "args": {},
+        "calls": calls,
         "text": choice.message.content or "",
         "raw_response": resp,
     }
@@ -97,35 +89,109 @@ def call_llm_choose_tool(user_text: str) -> dict:
 
 def safe_invoke_tool(func_name: str, args: dict) -> dict:
     """
-    Call the correct underlying Python function and return a dict result.
+    Validate `args` against the tool's signature and call the underlying Python function.
+    Raises ValueError for unknown tools or invalid arguments.
     """
+    return TOOL_REGISTRY.invoke(func_name, args)
 
-    if func_name == "spotify_split_playlist":
-        source = args.get("source_playlist") or args.get("source")
-        if not source:
-            raise ValueError("Missing 'source_playlist' argument.")
-        make_public = bool(args.get("make_public", False))
-        return split_playlist_by_year(source, make_public=make_public)
-
-    elif func_name == "spotify_delete_year_playlists":
-        source_name = args.get("source_name")
-        if not source_name:
-            raise ValueError("Missing 'source_name'.")
-        year = args.get("year")
-        dry_run = bool(args.get("dry_run", True))
-        force = bool(args.get("force", False))
-        no_tag_check = bool(args.get("no_tag_check", False))
-
-        return delete_year_playlists(
-            source_name=source_name,
-            year=year,
-            require_tag=(not no_tag_check),
-            dry_run=dry_run,
-            force=force,
-        )
 
+def _tool_resource_key(func_name: str, args: dict) -> str:
+    # Calls of the same tool on the same source must not run concurrently
+    if func_name == "spotify_split_playlist":
+        # A playlist URL and its bare ID are the same source
+        src = _parse_playlist_id(str(args.get("source_playlist") or args.get("source") or "").strip())
     else:
-        raise ValueError(f"Unknown function: {func_name}")
+        src = args.get("source_name") or ""
+    return f"{func_name}:{str(src).strip().lower()}"
+
+
+def _tool_is_interactive(func_name: str, args: dict) -> bool:
+    # A real (non dry-run) delete without force prompts on stdin
+    if func_name != "spotify_delete_year_playlists":
+        return False
+    kwargs = TOOL_REGISTRY.validate(func_name, args)
+    return not kwargs.get("dry_run", True) and not kwargs.get("force", False)
+
+
+def plan_tool_batch(calls: List[dict]) -> dict:
+    """
+    Validate a list of LLM tool calls and arrange them into dependency-ordered stages.
+
+    Calls within a stage are independent and may run concurrently. A call that touches
+    the same source as an earlier call is placed in a later stage so the original order
+    is kept for that source. Splits name their source by URL/ID and deletes by playlist
+    name, so the two can't be matched without API calls: a split and a delete in the same
+    batch always run one after the other, in the order given. Exact duplicates are dropped.
+    Returns:
+        { "stages": [[call, ...], ...], "rejected": [{"name", "args", "error"}, ...] }
+    """
+    stages: List[List[dict]] = []
+    rejected = []
+    last_stage_for_key: dict = {}
+    last_stage_for_tool: dict = {}
+    seen = set()
+
+    for call in calls:
+        name = call.get("name")
+        args = call.get("args") or {}
+        try:
+            TOOL_REGISTRY.validate(name, args)
+        except ValueError as e:
+            rejected.append({"name": name, "args": args, "error": str(e)})
+            continue
+
+        fingerprint = (name, json.dumps(args, sort_keys=True, default=str))
+        if fingerprint in seen:
+            continue
+        seen.add(fingerprint)
+
+        key = _tool_resource_key(name, args)
+        stage_idx = last_stage_for_key[key] + 1 if key in last_stage_for_key else 0
+        # e.g. a split of Chill's URL and a delete of "Chill" race on the same year-playlists
+        for other, other_stage in last_stage_for_tool.items():
+            if other != name:
+                stage_idx = max(stage_idx, other_stage + 1)
+        last_stage_for_key[key] = stage_idx
+        last_stage_for_tool[name] = max(last_stage_for_tool.get(name, -1), stage_idx)
+        while len(stages) <= stage_idx:
+            stages.append([])
+        stages[stage_idx].append(call)
+
+    return {"stages": stages, "rejected": rejected}
+
+
+def _invoke_for_batch(call: dict) -> dict:
+    entry = {"id": call.get("id"), "name": call["name"], "args": call.get("args") or {}}
+    try:
+        entry["result"] = safe_invoke_tool(call["name"], entry["args"])
+    except Exception as e:
+        entry["error"] = str(e)
+    return entry
+
+
+def run_tool_batch(plan: dict, max_workers: int = BATCH_MAX_WORKERS) -> List[dict]:
+    """
+    Execute a plan from `plan_tool_batch`, stage by stage.
+    Independent calls in a stage run concurrently; calls that need interactive
+    confirmation run afterwards one at a time. Failures are captured per call.
+    Returns a list of { "id", "name", "args", "result" | "error" } in plan order.
+    """
+    results: List[dict] = [dict(r) for r in plan.get("rejected", [])]
+    stages = plan.get("stages", [])
+    if not stages:
+        return results
+
+    # Authenticate once up front so workers don't race each other through OAuth
+    _ensure_token()
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        for stage in stages:
+            concurrent = [c for c in stage if not _tool_is_interactive(c["name"], c.get("args") or {})]
+            interactive = [c for c in stage if _tool_is_interactive(c["name"], c.get("args") or {})]
+            results.extend(pool.map(_invoke_for_batch, concurrent))
+            for call in interactive:
+                results.append(_invoke_for_batch(call))
+    return results
 
 
 def ask_llm_to_say_tool_result(user_text: str, tool_name: str, tool_args: dict, tool_result: dict) -> str:
@@ -157,4 +223,35 @@ def ask_llm_to_say_tool_result(user_text: str, tool_name: str, tool_args: dict,
         temperature=0.3,
     )
 
-    return resp.choices[0].message.content.strip()
\ No newline at end of file
+    return resp.choices[0].message.content.strip()
+
+
+def ask_llm_to_say_batch_result(user_text: str, results: List[dict]) -> str:
+    """
+    Produce one short, spoken-style summary covering every tool call in a batch.
+    """
+    summary = [
+        {k: r.get(k) for k in ("name", "args", "result", "error") if k in r}
+        for r in results
+    ]
+    messages = [
+        {"role": "system", "content": "You are Jarvis. Polite, concise, slightly formal. Reply in 1–3 sentences."},
+        {"role": "user", "content": user_text},
+        {
+            "role": "assistant",
+            "content": f"I ran {len(results)} tool call(s). Results: {json.dumps(summary, default=str)}"
+        },
+        {
+            "role": "user",
+            "content": "Given the tool results above, produce one brief spoken reply summarizing every outcome, including any failures."
+        },
+    ]
+
+    resp = client.chat.completions.create(
+        model=CHAT_MODEL,
+        messages=messages,
+        max_tokens=300,
+        temperature=0.3,
+    )
+
+    return resp.choices[0].message.content.strip()
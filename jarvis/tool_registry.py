@@ -0,0 +1,249 @@
+# tool_registry.py
+"""
+Jarvis tool registry, generated from the Python API.
+
+Each tool's JSON schema (description, parameter types, defaults, required args) is
+derived from the signature and docstring of the function it calls. The compiled
+registry is cached in __pycache__ as a marshal blob keyed by a hash of the source
+files, so startup skips introspection and JSON parsing when nothing changed.
+"""
+import hashlib
+import inspect
+import marshal
+import pathlib
+import re
+import typing
+
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from ..apis.api import split_playlist_by_year, delete_year_playlists
+from ..apis.constants import DESCRIPTION_TAG
+
+# (tool name, function, {python parameter -> tool argument name})
+# Add new operations here; everything else is derived.
+TOOL_SOURCES: List[Tuple[str, Callable, Dict[str, str]]] = [
+    ("spotify_split_playlist", split_playlist_by_year, {"source_url_or_id": "source_playlist"}),
+    ("spotify_delete_year_playlists", delete_year_playlists, {}),
+]
+
+# Older argument names the LLM (or callers) may still send: tool -> {alias -> argument}
+TOOL_ARG_ALIASES: Dict[str, Dict[str, str]] = {
+    "spotify_split_playlist": {"source": "source_playlist"},
+}
+
+# Parameters that are operational settings, not user choices: never shown to (or accepted
+# from) the LLM, so the function's default always applies. They must have defaults.
+TOOL_HIDDEN_ARGS: Dict[str, Set[str]] = {
+    "spotify_split_playlist": {"spill_threshold"},
+}
+
+# Code names in docstrings -> wording the LLM (and the user it talks to) understands
+TOOL_TEXT_REPLACEMENTS: Dict[str, str] = {
+    "DESCRIPTION_TAG": f"the {DESCRIPTION_TAG} description tag",
+}
+
+CACHE_PATH = pathlib.Path(__file__).parent / "__pycache__" / "tool_registry.cache"
+_CACHE_VERSION = 1
+
+_JSON_TYPES = {str: "string", bool: "boolean", int: "integer", float: "number"}
+
+
+def _source_hash() -> str:
+    h = hashlib.sha256(str(_CACHE_VERSION).encode("ascii"))
+    files = {inspect.getsourcefile(fn) for _, fn, _ in TOOL_SOURCES} | {__file__}
+    for path in sorted(files):
+        h.update(pathlib.Path(path).read_bytes())
+    # Replacement values come from apis/constants.py, which is not among the files above
+    for name, text in sorted(TOOL_TEXT_REPLACEMENTS.items()):
+        h.update(f"{name}={text}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def _describe(fn: Callable) -> Tuple[str, Dict[str, str]]:
+    """
+    Split a docstring into the summary paragraph and per-parameter descriptions taken
+    from "- If <param> is ..." style bullets (the first parameter a bullet mentions).
+    """
+    doc = inspect.getdoc(fn) or ""
+    paragraphs = doc.split("\n\n")
+    summary = " ".join(paragraphs[0].split()) if paragraphs else ""
+    params = list(inspect.signature(fn).parameters)
+    bullets: List[str] = []
+    for line in doc.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("- "):
+            bullets.append(stripped[2:])
+        elif bullets and stripped and line.startswith("  "):
+            bullets[-1] += " " + stripped
+    described: Dict[str, str] = {}
+    for text in bullets:
+        hits = [(m.start(), p) for p in params for m in [re.search(rf"\b{re.escape(p)}\b", text)] if m]
+        if hits:
+            described.setdefault(min(hits)[1], text)
+    return summary, described
+
+
+def _type_of(annotation) -> Tuple[str, bool]:
+    # (json type, nullable) for str/bool/int/float and Optional[...] of those
+    nullable = False
+    if typing.get_origin(annotation) is typing.Union:
+        args = [a for a in typing.get_args(annotation) if a is not type(None)]
+        nullable = len(args) < len(typing.get_args(annotation))
+        annotation = args[0] if len(args) == 1 else str
+    return _JSON_TYPES.get(annotation, "string"), nullable
+
+
+def _rename_in_text(text: str, renames: Dict[str, str]) -> str:
+    # Docstrings name Python parameters and constants; the LLM only knows the tool
+    # argument names
+    for py_name, arg in {**TOOL_TEXT_REPLACEMENTS, **renames}.items():
+        text = re.sub(rf"\b{re.escape(py_name)}\b", arg, text)
+    return text
+
+
+def _compile_tool(name: str, fn: Callable, renames: Dict[str, str]) -> dict:
+    summary, described = _describe(fn)
+    summary = _rename_in_text(summary, renames)
+    hints = typing.get_type_hints(fn)
+    hidden = TOOL_HIDDEN_ARGS.get(name, set())
+    properties = {}
+    required = []
+    params = []
+    for p in inspect.signature(fn).parameters.values():
+        if p.name in hidden:
+            if p.default is inspect.Parameter.empty:
+                raise ValueError(f"{name}: hidden parameter '{p.name}' needs a default.")
+            continue
+        arg = renames.get(p.name, p.name)
+        json_type, nullable = _type_of(hints.get(p.name, str))
+        prop = {
+            "type": [json_type, "null"] if nullable else json_type,
+            "description": _rename_in_text(described.get(p.name, p.name.replace("_", " ")), renames),
+        }
+        has_default = p.default is not inspect.Parameter.empty
+        if has_default and p.default is not None:
+            prop["default"] = p.default
+        if not has_default:
+            required.append(arg)
+        properties[arg] = prop
+        params.append((arg, p.name, json_type, nullable, not has_default))
+    schema = {
+        "type": "function",
+        "function": {
+            "name": name,
+            "description": summary,
+            "parameters": {"type": "object", "properties": properties, "required": required},
+        },
+    }
+    return {"name": name, "schema": schema, "params": params}
+
+
+def _load_compiled() -> List[dict]:
+    digest = _source_hash()
+    try:
+        cached = marshal.loads(CACHE_PATH.read_bytes())
+        if cached.get("hash") == digest:
+            return cached["tools"]
+    except Exception:
+        pass
+    tools = [_compile_tool(name, fn, renames) for name, fn, renames in TOOL_SOURCES]
+    try:
+        CACHE_PATH.parent.mkdir(exist_ok=True)
+        CACHE_PATH.write_bytes(marshal.dumps({"hash": digest, "tools": tools}))
+    except OSError:
+        pass  # read-only install: just recompile next time
+    return tools
+
+
+def _coerce(tool: str, arg: str, value, json_type: str, nullable: bool):
+    if value is None:
+        if nullable:
+            return None
+        raise ValueError(f"{tool}: '{arg}' must not be null.")
+    if json_type == "boolean":
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, str) and value.strip().lower() in ("true", "false"):
+            return value.strip().lower() == "true"
+    elif json_type == "string":
+        if isinstance(value, str):
+            return value
+        if isinstance(value, int) and not isinstance(value, bool):
+            return str(value)  # e.g. year=2019
+    elif json_type == "integer":
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+    elif json_type == "number":
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return value
+    raise ValueError(f"{tool}: '{arg}' must be of type {json_type}, got {type(value).__name__}.")
+
+
+class ToolRegistry:
+    """
+    Name -> tool lookup with typed argument validation and dispatch.
+    """
+
+    def __init__(self, compiled: List[dict]):
+        functions = {name: fn for name, fn, _ in TOOL_SOURCES}
+        self._tools = {t["name"]: (functions[t["name"]], t["params"]) for t in compiled}
+        self.schemas = [t["schema"] for t in compiled]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    def validate(self, name: str, args: dict) -> dict:
+        """
+        Check `args` against the tool's signature and return the keyword arguments
+        for the underlying function. Raises ValueError on unknown tools/arguments,
+        missing required arguments or wrong types.
+        """
+        if name not in self._tools:
+            raise ValueError(f"Unknown function: {name}")
+        _, params = self._tools[name]
+        aliases = TOOL_ARG_ALIASES.get(name, {})
+        given = {}
+        for key, value in (args or {}).items():
+            given.setdefault(aliases.get(key, key), value)
+        known = {p[0] for p in params}
+        unknown = sorted(set(given) - known)
+        if unknown:
+            raise ValueError(f"{name}: unknown argument(s): {', '.join(unknown)}")
+        kwargs = {}
+        missing = []
+        for arg, py_name, json_type, nullable, required in params:
+            if arg not in given or (required and given[arg] in (None, "")):
+                if required:
+                    missing.append(arg)
+                continue
+            kwargs[py_name] = _coerce(name, arg, given[arg], json_type, nullable)
+        if missing:
+            raise ValueError(f"Missing argument(s): {', '.join(missing)}")
+        return kwargs
+
+    def invoke(self, name: str, args: dict) -> dict:
+        kwargs = self.validate(name, args)
+        return self._tools[name][0](**kwargs)
+
+    def signature_lines(self) -> List[str]:
+        # "spotify_split_playlist(source_playlist: str, make_public: bool = False)" style, for prompts
+        lines = []
+        for schema in self.schemas:
+            fn = schema["function"]
+            parts = []
+            for arg, prop in fn["parameters"]["properties"].items():
+                t = prop["type"]
+                t = f"Optional[{t[0]}]" if isinstance(t, list) else t
+                parts.append(f"{arg}: {t}")
+            lines.append(f"{fn['name']}({', '.join(parts)})")
+        return lines
+
+
+_REGISTRY: Optional[ToolRegistry] = None
+
+
+def get_registry() -> ToolRegistry:
+    global _REGISTRY
+    if _REGISTRY is None:
+        _REGISTRY = ToolRegistry(_load_compiled())
+    return _REGISTRY
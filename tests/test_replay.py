@@ -0,0 +1,60 @@
+"""
+Offline request-count checks: replay recorded cassettes (tests/fixtures/) through the
+split/delete operations and fail when a run needs more API requests than the recording.
+
+The fixtures were recorded with `apis.bench record` from a small synthetic account
+(a 230-track "Road Trip" playlist with duplicates, a local file and an episode).
+Re-record them when a change intentionally adds requests.
+
+    python3 -m unittest discover -s tests
+"""
+import importlib
+import pathlib
+import sys
+import unittest
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+FIXTURES = ROOT / "tests" / "fixtures"
+
+# The package directory name has dashes, so it can only be imported via importlib
+sys.path.insert(0, str(ROOT.parent))
+bench = importlib.import_module(f"{ROOT.name}.apis.bench")
+
+
+class ReplayRequestCountTest(unittest.TestCase):
+    def replay(self, cassette: str, op: str, target: str, year=None) -> dict:
+        result = bench.replay_operation(str(FIXTURES / cassette), op, target, year)
+        self.assertLessEqual(
+            result["requests"], result["recorded_requests"],
+            f"request-count regression: {result['by_endpoint']} vs recorded {result['recorded_by_endpoint']}",
+        )
+        for endpoint, count in result["by_endpoint"].items():
+            self.assertLessEqual(count, result["recorded_by_endpoint"].get(endpoint, 0), endpoint)
+        return result
+
+    def test_split(self):
+        result = self.replay("split.jsonl.gz", "split", "src")
+        self.assertEqual(result["requests"], 16)
+        summary = result["summary"]
+        self.assertEqual(summary["total_tracks_added"], 230)
+        self.assertEqual(len(summary["created_playlists"]), 5)
+        self.assertEqual((summary["skipped_local_files"], summary["skipped_episodes"]), (1, 1))
+
+    def test_mirror(self):
+        result = self.replay("mirror.jsonl.gz", "mirror", "src")
+        self.assertEqual(result["requests"], 15)
+        self.assertEqual(result["summary"]["total_tracks_removed"], 60)
+
+    def test_delete_preview(self):
+        result = self.replay("delete_preview.jsonl.gz", "delete-preview", "Road Trip")
+        self.assertEqual(result["requests"], 2)
+        self.assertEqual(result["summary"]["found_count"], 5)
+
+    def test_delete(self):
+        result = self.replay("delete.jsonl.gz", "delete", "Road Trip", year="1992")
+        self.assertEqual(result["requests"], 3)
+        self.assertEqual(result["summary"]["deleted_count"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()